@@ -0,0 +1,211 @@
+# batch_render.py
+#
+# Renders a manifest of jobs in one interpreter, so fonts, shaped strings and
+# template images are loaded once for the whole batch.
+#
+# Manifest formats (jobs use the same shape as render_server requests):
+#   .jsonl  {"id": "a1", "template": "newspaper", "params": {...}}
+#   .csv    header row with 'template' and optional 'id', every other column is
+#           a template parameter. '*_text' and '*_path' cells are taken as strings,
+#           other cells are parsed as JSON when possible ("3", "true", "null").
+#           Empty cells are skipped.
+#
+# Run from the repository root (template asset paths are relative):
+#   python src/Craft/batch_render.py jobs.jsonl --report report.json
+#   python src/Craft/batch_render.py jobs.jsonl --workers 4
+#   python src/Craft/batch_render.py jobs.jsonl --workers 1,2,4   # throughput comparison
+#
+# In a comparison, --cache_dir gets a fresh subdirectory per worker count, so
+# later counts render the batch too instead of reading the first run's cache.
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from render_cache import DEFAULT_CACHE_MAX_BYTES, add_cache_arguments
+from render_jobs import init_worker, run_job
+
+
+def _parse_cell(key: str, value: str) -> Any:
+    if key.endswith(("_text", "_path")):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads a JSONL or CSV manifest into a list of job descriptions.
+
+    Args:
+        path (str): Manifest path; '.csv' files are read as CSV, anything else as JSONL.
+
+    Returns:
+        list[dict]: Jobs in manifest order. Jobs without an id get their 1-based line number.
+    """
+    jobs: List[Dict[str, Any]] = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                job_id = row.pop("id", None)
+                job: Dict[str, Any] = {"template": row.pop("template", None)}
+                job["params"] = {
+                    key: _parse_cell(key, value) for key, value in row.items() if value
+                }
+                if job_id:
+                    job["id"] = job_id
+                jobs.append(job)
+        else:
+            for line in f:
+                if line.strip():
+                    jobs.append(json.loads(line))
+
+    for number, job in enumerate(jobs, start=1):
+        job.setdefault("id", number)
+    return jobs
+
+
+def render_batch(
+    jobs: List[Dict[str, Any]],
+    workers: int = 1,
+    verbose: bool = False,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    Renders all jobs, in this process or in a pool of worker processes. A
+    failing job is recorded and skipped; it never aborts the rest of the batch.
+
+    Each worker warms its own fonts and template images once, then takes jobs
+    from the pool's queue. Results always come back in input order.
+
+    Args:
+        jobs (list[dict]): Job descriptions as accepted by render_jobs.run_job.
+        workers (int): Number of worker processes; 1 renders in this process.
+        verbose (bool): If True, print one status line per job to stderr.
+        cache_dir (str): Optional render cache directory, shared by all workers.
+                         Jobs already rendered with identical inputs are not rendered again.
+        cache_max_bytes (int): Size limit of the render cache; least recently used renders are evicted.
+
+    Returns:
+        dict: {'results': per-job results in input order, 'summary': totals}.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
+
+    start = time.perf_counter()
+    warm_up_s = None
+    results = []
+
+    def collect(result: Dict[str, Any]) -> None:
+        results.append(result)
+        if verbose:
+            status = "ok" if result["ok"] else f"FAILED {result['error']}"
+            print(f"[{result['id']}] {result['elapsed_ms']:.1f} ms {status}", file=sys.stderr)
+
+    if workers == 1:
+        init_worker(cache_dir, cache_max_bytes)
+        warm_up_s = round(time.perf_counter() - start, 3)
+        for job in jobs:
+            collect(run_job(job))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(cache_dir, cache_max_bytes)
+        ) as executor:
+            try:
+                for result in executor.map(run_job, jobs):
+                    collect(result)
+            except BrokenProcessPool as exc:  # a worker died; the pool takes no more jobs
+                error = f"{type(exc).__name__}: {exc}"
+                for job in jobs[len(results):]:
+                    collect({"id": job.get("id"), "ok": False, "error": error, "elapsed_ms": 0.0})
+
+    wall_s = time.perf_counter() - start
+    succeeded = sum(1 for result in results if result["ok"])
+    summary = {
+        "jobs": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "cache_hits": sum(1 for result in results if result.get("cache") == "hit"),
+        "workers": workers,
+        "warm_up_s": warm_up_s,
+        "wall_s": round(wall_s, 3),
+        "images_per_s": round(succeeded / wall_s, 3) if wall_s else 0.0,
+    }
+    return {"results": results, "summary": summary}
+
+
+def _worker_counts(value: str) -> List[int]:
+    counts = [int(part) for part in value.split(",") if part.strip()]
+    if not counts or min(counts) < 1:
+        raise argparse.ArgumentTypeError("expected worker counts like '4' or '1,2,4'.")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render many newspaper / breaking news images from a JSONL or CSV manifest."
+    )
+    parser.add_argument("manifest", type=str, help="Path to a .jsonl or .csv manifest.")
+    parser.add_argument(
+        "--workers",
+        type=_worker_counts,
+        default=[1],
+        help="Worker processes, e.g. '4'. A list like '1,2,4' renders the batch "
+        "once per count and prints a throughput comparison.",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Write per-job timings and failures as JSON to this path.",
+    )
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    comparison = len(args.workers) > 1
+    summaries = []
+    for workers in args.workers:
+        with contextlib.ExitStack() as stack:
+            cache_dir = args.cache_dir
+            if cache_dir and comparison:
+                # Each count starts from an empty cache, so every run renders
+                # the batch instead of reading the previous run's output.
+                os.makedirs(cache_dir, exist_ok=True)
+                cache_dir = stack.enter_context(
+                    tempfile.TemporaryDirectory(prefix=f"workers-{workers}-", dir=cache_dir)
+                )
+            report = render_batch(
+                jobs,
+                workers=workers,
+                verbose=not comparison,
+                cache_dir=cache_dir,
+                cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+            )
+        summaries.append(report["summary"])
+        print(json.dumps(report["summary"]))
+
+    if comparison:
+        print("workers  images/s  wall_s", file=sys.stderr)
+        for summary in summaries:
+            print(
+                f"{summary['workers']:>7}  {summary['images_per_s']:>8.2f}  {summary['wall_s']:>6.2f}",
+                file=sys.stderr,
+            )
+        report["throughput"] = summaries
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if any(summary["failed"] for summary in summaries) else 0)
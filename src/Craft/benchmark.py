@@ -0,0 +1,330 @@
+# benchmark.py
+#
+# Times the text layout and template render hot paths on a fixed corpus and
+# saves the results as JSON, so runs from different commits can be compared.
+#
+# Run from the repository root (fonts and templates are loaded from ./assets):
+#   python src/Craft/benchmark.py --output bench.json
+#   python src/Craft/benchmark.py --compare bench.json   # ratios against an older run
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import PIL
+from PIL import Image, ImageDraw, features
+
+import breaking_news_template
+import date_util
+import newspaper_template
+import text_utils
+from font_cache import get_font
+from img_util import apply_watermark
+from render_context import RenderContext
+from template_engine import load_plan
+
+# Fixed corpus: short and long headlines in Persian and Latin script.
+HEADLINES: Dict[str, str] = {
+    "fa_short": "خبر فوری",
+    "fa_long": "كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان در عملیات مشترک نیروی دریایی",
+    "en_short": "Breaking News",
+    "en_long": "Markets rally worldwide as central banks signal a coordinated pause in interest rate hikes this quarter",
+}
+
+BREAKING_FONT = load_plan(breaking_news_template.TEMPLATE_NAME).fonts["headline"]
+WATERMARK_PATH = "./assets/images/watermark_no_back_ground.png"
+
+# Every template render is drawn for the same moment, so runs are comparable byte for byte.
+BENCH_CONTEXT = RenderContext.at("2025-03-21T12:00:00+03:30")
+
+DEFAULT_REPEAT: int = 5
+PREVIEW_SCALES = (0.5, 0.25)
+
+
+def time_call(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Times func over several runs after discarding warm-up runs.
+
+    Returns:
+        dict: min/median/mean wall time in milliseconds and the run count.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "runs": repeat,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _make_photo(path: str, size=(3024, 4032)) -> None:
+    """Writes a deterministic gradient 'phone photo' JPEG."""
+    gradient = Image.linear_gradient("L").resize(size)
+    bands = (gradient, gradient.rotate(90), gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT))
+    Image.merge("RGB", bands).save(path, format="JPEG", quality=90)
+
+
+def bench_text(repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    draw = text_utils.create_temporary_draw(1, 1)
+    font = get_font(BREAKING_FONT, 140)
+    for name, text in HEADLINES.items():
+        results[f"wrap_text_to_fit[{name}]"] = time_call(
+            lambda: text_utils.wrap_text_to_fit(text, font, 2820, draw), repeat
+        )
+        results[f"calculate_font_size_to_fit[{name}]"] = time_call(
+            lambda: text_utils.calculate_font_size_to_fit(text, BREAKING_FONT, 2820, 444, line_spacing=1.5),
+            repeat,
+        )
+
+        canvas = Image.new("RGBA", (4000, 600), "white")
+        canvas_draw = ImageDraw.Draw(canvas)
+        results[f"draw_text_in_box[{name}]"] = time_call(
+            lambda: text_utils.draw_text_in_box(
+                canvas_draw,
+                text,
+                BREAKING_FONT,
+                (1080, 50, 2820, 444),
+                alignment="right",
+                auto_size=True,
+                line_spacing=1.5,
+                is_rtl=False,
+            ),
+            repeat,
+        )
+
+    # A date label as the templates draw it: the first call rasterizes, the rest paste the sprite.
+    label = "جمعه ۱ فروردین ۱۴۰۴"
+    canvas = Image.new("RGBA", (2000, 200), "white")
+    canvas_draw = ImageDraw.Draw(canvas)
+    results["draw_text_no_box[date_label]"] = time_call(
+        lambda: text_utils.draw_text_no_box(
+            canvas_draw,
+            label,
+            BREAKING_FONT,
+            1900,
+            50,
+            alignment="right",
+            color="white",
+            font_size=100,
+        ),
+        repeat,
+    )
+    return results
+
+
+def bench_dates(repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Times batch date labeling: the newspaper's five date labels for every day
+    of a year, through the public functions and through compiled formatters.
+    The calendar table is built first, so only formatting is measured.
+    """
+    start = datetime(2025, 1, 1)
+    table = date_util.precompute_date_table(start, days=366)
+    specs = [
+        date_util.DateFormat("shamsi", ("day",)),
+        date_util.DateFormat("shamsi", ("month", "year")),
+        date_util.DateFormat("islamic"),
+        date_util.DateFormat("gregorian", language="english"),
+        date_util.DateFormat("weekday"),
+    ]
+    formatters = [date_util.compile_date_formatter(spec) for spec in specs]
+    numbers = [str(1400 + n) for n in range(366)]
+
+    def label_with_functions():
+        for offset in range(len(table)):
+            date_util.shamsi(year=False, month=False, day=True, date=start, days_into_future=offset)
+            date_util.shamsi(year=True, month=True, day=False, date=start, days_into_future=offset)
+            date_util.arabic(year=True, month=True, day=True, date=start, days_into_future=offset)
+            date_util.georgian(year=True, month=True, day=True, date=start, days_into_future=offset)
+            date_util.day_of_week(date=start, days_into_future=offset)
+
+    def label_with_formatters():
+        for bundle in table:
+            for formatter in formatters:
+                formatter.format_bundle(bundle)
+
+    return {
+        "to_farsi_numerals[366]": time_call(
+            lambda: [date_util.to_farsi_numerals(number) for number in numbers], repeat
+        ),
+        "date_labels_functions[366 days]": time_call(label_with_functions, repeat),
+        "date_labels_compiled[366 days]": time_call(label_with_formatters, repeat),
+    }
+
+
+def bench_watermark(repeat: int) -> Dict[str, Dict[str, float]]:
+    if not os.path.isfile(WATERMARK_PATH):
+        return {}
+    base = Image.new("RGBA", (4000, 5000), (200, 200, 200, 255))
+    return {
+        "apply_watermark": time_call(
+            lambda: apply_watermark(
+                base, WATERMARK_PATH, position=(200, 3100), scale=2.6, opacity=0.8, adaptive_color=True
+            ),
+            repeat,
+        )
+    }
+
+
+def bench_templates(repeat: int, workdir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Times both full template renders. When a template's base PNG is not
+    available the render runs in composed mode on a blank canvas instead, and
+    the result records which mode was measured.
+    """
+    photo = os.path.join(workdir, "photo.jpg")
+    _make_photo(photo)
+    canvas = os.path.join(workdir, "canvas.png")
+    Image.new("RGB", (4000, 5000), "white").save(canvas)
+    output = os.path.join(workdir, "output.jpg")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    newspaper_composed = not os.path.isfile(load_plan(newspaper_template.TEMPLATE_NAME).base)
+    breaking_composed = not os.path.isfile(load_plan(breaking_news_template.TEMPLATE_NAME).base)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        for name in ("fa_short", "fa_long"):
+            results[f"create_newspaper_image[{name}]"] = time_call(
+                lambda: newspaper_template.create_newspaper_image(
+                    user_image_path=canvas if newspaper_composed else photo,
+                    overline_text=HEADLINES["fa_short"],
+                    main_headline_text=HEADLINES[name],
+                    output_path=output,
+                    event1_text="رویداد یک",
+                    event2_text="رویداد دو",
+                    watermark=True,
+                    composed=newspaper_composed,
+                    context=BENCH_CONTEXT,
+                ),
+                repeat,
+            )
+            results[f"create_newspaper_image[{name}]"]["composed"] = newspaper_composed
+
+            results[f"create_breaking_news_image[{name}]"] = time_call(
+                lambda: breaking_news_template.create_breaking_news_image(
+                    user_image_path=canvas if breaking_composed else photo,
+                    headline_text=HEADLINES[name],
+                    output_path=output,
+                    composed=breaking_composed,
+                    context=BENCH_CONTEXT,
+                ),
+                repeat,
+            )
+            results[f"create_breaking_news_image[{name}]"]["composed"] = breaking_composed
+
+        # Draft previews of the long headline at reduced resolution.
+        for scale in PREVIEW_SCALES:
+            name = f"create_newspaper_image[fa_long@{scale}]"
+            results[name] = time_call(
+                lambda: newspaper_template.create_newspaper_image(
+                    user_image_path=canvas if newspaper_composed else photo,
+                    overline_text=HEADLINES["fa_short"],
+                    main_headline_text=HEADLINES["fa_long"],
+                    output_path=output,
+                    event1_text="رویداد یک",
+                    event2_text="رویداد دو",
+                    watermark=True,
+                    composed=newspaper_composed,
+                    scale=scale,
+                    context=BENCH_CONTEXT,
+                ),
+                repeat,
+            )
+            results[name]["composed"] = newspaper_composed
+    return results
+
+
+def run_benchmarks(repeat: int = DEFAULT_REPEAT, groups: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Runs the selected benchmark groups ('text', 'dates', 'watermark', 'templates').
+
+    Returns:
+        dict: {'meta': environment details, 'results': name -> timing}.
+    """
+    groups = groups or ["text", "dates", "watermark", "templates"]
+    results: Dict[str, Dict[str, Any]] = {}
+    if "text" in groups:
+        results.update(bench_text(repeat))
+    if "dates" in groups:
+        results.update(bench_dates(repeat))
+    if "watermark" in groups:
+        results.update(bench_watermark(repeat))
+    if "templates" in groups:
+        with tempfile.TemporaryDirectory() as workdir:
+            results.update(bench_templates(repeat, workdir))
+
+    meta = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "raqm": features.check("raqm"),
+        "machine": platform.machine(),
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Formats median-time ratios of current results against a baseline run."""
+    rows = [f"{'benchmark':<48} {'base ms':>10} {'now ms':>10} {'ratio':>7}"]
+    for name, timing in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = timing["median_ms"] / before["median_ms"] if before["median_ms"] else float("nan")
+        rows.append(f"{name:<48} {before['median_ms']:>10.2f} {timing['median_ms']:>10.2f} {ratio:>7.2f}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark text layout and template rendering.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per benchmark.")
+    parser.add_argument(
+        "--groups",
+        type=str,
+        default="text,dates,watermark,templates",
+        help="Comma-separated benchmark groups to run.",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path.")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline JSON to compare against.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.repeat, args.groups.split(","))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))))
+    else:
+        for name, timing in report["results"].items():
+            print(f"{name:<48} median {timing['median_ms']:>10.2f} ms")
@@ -1,23 +1,90 @@
-from PIL import Image, ImageDraw
-from datetime import datetime
-from convertdate import persian
-from text_utils import draw_text_in_box, draw_text_no_box
-from date_util import shamsi, clock_time
-from typing import Optional
+from PIL import Image
+from render_context import (
+    RenderContext,
+    add_context_arguments,
+    context_from_args,
+)
+from img_util import (
+    PHOTO_FITS,
+    ImageSource,
+    OutputTarget,
+)
+from image_encoder import (
+    EncoderSettings,
+    add_encoder_arguments,
+    encoder_from_args,
+    save_encoded,
+)
+from render_cache import RenderCache, add_cache_arguments, cache_from_args, render_cached
+from render_profile import add_profile_arguments, profile_render
+from template_engine import load_plan
+from typing import Dict, Optional
 import argparse
 
-DEFAULT_IS_RTL: bool = False
+# The layout lives in template_specs/breaking_news.json. Its plan is loaded on first
+# use and reloaded when the spec changes, so read base, fonts and assets from
+# load_plan(TEMPLATE_NAME) rather than keeping copies.
+TEMPLATE_NAME = "breaking_news"
+
+
+def date_labels(context: RenderContext, days_into_future: int = 0) -> Dict[str, str]:
+    """
+    Returns the date texts the breaking news image draws for a render context.
+
+    Returns:
+        dict: {'persian_date': Shamsi month and day, 'time': hours and minutes}.
+    """
+    return load_plan(TEMPLATE_NAME).date_labels(context, days_into_future)
+
+
+def build_breaking_news_image(
+    user_image_path: ImageSource,
+    headline_text: str,
+    font_size_delta: int = 0,
+    dynamic_font_size: bool = True,
+    composed: bool = False,
+    scale: float = 1.0,
+    photo_fit: str = "stretch",
+    context: Optional[RenderContext] = None,
+    **kwargs,
+) -> Image.Image:
+    """
+    Renders the breaking news image in memory without encoding it.
+
+    Takes the same arguments as create_breaking_news_image, minus output_path and encoder.
+    The layout is the 'breaking_news' template spec (see template_engine).
+
+    Returns:
+        Image.Image: The finished RGBA image.
+    """
+    return load_plan(TEMPLATE_NAME).render(
+        user_image_path,
+        composed=composed,
+        scale=scale,
+        photo_fit=photo_fit,
+        context=context,
+        headline_text=headline_text,
+        font_size_delta=font_size_delta,
+        dynamic_font_size=dynamic_font_size,
+        **kwargs,
+    )
 
 
 def create_breaking_news_image(
-    user_image_path: str,
+    user_image_path: ImageSource,
     headline_text: str,
-    output_path: str,
+    output_path: Optional[OutputTarget],
     font_size_delta: int = 0,
     dynamic_font_size: bool = True,
     composed: bool = False,  # New boolean parameter.
+    encoder: Optional[EncoderSettings] = None,
+    scale: float = 1.0,
+    photo_fit: str = "stretch",
+    context: Optional[RenderContext] = None,
+    cache: Optional[RenderCache] = None,
+    profile: bool = False,
     **kwargs,
-) -> None:
+) -> Optional[bytes]:
     """
     Generates a breaking news image with headline, Persian date, and time.
 
@@ -27,95 +94,62 @@ def create_breaking_news_image(
 
     Args:
         user_image_path (str): Path to the user image to embed or to a pre-composed base image.
+                               Encoded image bytes or a binary file-like object are accepted too.
         headline_text (str): The main headline text.
-        output_path (str): Where to save the final image.
+        output_path (str): Where to save the final image: a file path or writable binary buffer.
+                           If None, the encoded image is returned instead.
         font_size_delta (int): General font size delta (optional).
         dynamic_font_size (bool): If True, auto-adjusts font size to fit.
         composed (bool): If True, assumes the base image is already composed (user image & overlay applied).
+        encoder (EncoderSettings): Output encoding (format, quality, size target, preview).
+                                   Defaults to a quality-95 JPEG.
+        scale (float): Render scale in (0, 1]. 0.5 or 0.25 renders a draft preview with every
+                       coordinate and font size scaled to match; 1 is the final full-size render.
+        photo_fit (str): How the user image fills its region: 'stretch' (default, ignores the
+                         aspect ratio), 'cover' (fill and center-crop) or 'contain' (fit inside, centered).
+        context (RenderContext): The moment the date and time are drawn for. Defaults to now;
+                                 a fixed context gives byte-identical output for the same inputs.
+        cache (RenderCache): Optional render cache. Identical inputs (photo, texts, flags, drawn
+                             date and time, template assets, encoder and code) return the stored
+                             image without rendering.
+        profile (bool): If True, write per-stage timings and call counts of this render as
+                        JSON to stderr (see render_profile; CRAFT_PROFILE=1 does the same
+                        for every render).
         **kwargs: Additional arguments passed to text utility functions.
+
+    Returns:
+        bytes or None: The encoded image when output_path is None, otherwise None.
     """
-    if composed:
-        # Use the pre-composed image directly.
-        base_img = Image.open(user_image_path).convert("RGBA")
-        draw = ImageDraw.Draw(base_img)
-    else:
-        # Load base template and compose with the user image and overlay.
-        base_img = Image.open(
-            "./assets/templates/Breaking News/breaking_news_base.png"
-        ).convert("RGBA")
-        draw = ImageDraw.Draw(base_img)
-
-        # Load and paste the user image.
-        user_img = Image.open(user_image_path).convert("RGBA")
-        # Define the target region (left, top, right, bottom)
-        region = (1890, 0, 4000, 2520)  # Example values
-        region_width = region[2] - region[0]
-        region_height = region[3] - region[1]
-        resized_user_img = user_img.resize((region_width, region_height))
-        base_img.paste(resized_user_img, region, resized_user_img)
-
-        # Apply overlay.
-        overlay_img = Image.open(
-            "./assets/templates/Breaking News/breaking_news_overlay.png"
-        ).convert("RGBA")
-        base_img.paste(overlay_img, (0, 0), overlay_img)
-
-    # Fonts.
-    fonts = {
-        "headline": "./assets/Font/Anjoman-Black.ttf",
-        "datetime": "./assets/Font/Sahel-Black-FD.ttf",
-    }
-
-    # Draw Headline Text.
-    headline_box = (1080, 2550, 2820, 444)  # (left, top, width, height)
-    base_font_size = 140 + font_size_delta
-
-    draw_text_in_box(
-        draw=draw,
-        text=headline_text,
-        font_path=fonts["headline"],
-        box=headline_box,
-        alignment="right",
-        vertical_mode="center_expanded",
-        auto_size=dynamic_font_size,
-        font_size=base_font_size,
-        color="black",
-        line_spacing=1.5,
-        is_rtl=DEFAULT_IS_RTL,
+    params = dict(
+        user_image_path=user_image_path,
+        headline_text=headline_text,
+        font_size_delta=font_size_delta,
+        dynamic_font_size=dynamic_font_size,
+        composed=composed,
+        scale=scale,
+        photo_fit=photo_fit,
+        context=context,
         **kwargs,
     )
-
-    # Draw Persian date (month + day).
-    persian_date_str = shamsi(year=False, month=True, day=True)
-
-    draw_text_no_box(
-        draw=draw,
-        text=persian_date_str,
-        font_path=fonts["datetime"],
-        x=450,
-        y=3600,
-        alignment="left",
-        font_size=100,
-        color=(109, 105, 115),
-        is_rtl=DEFAULT_IS_RTL,
-    )
-
-    # Draw Time.
-    time_str = clock_time()
-    draw_text_no_box(
-        draw=draw,
-        text=time_str,
-        font_path=fonts["datetime"],
-        x=450,
-        y=3750,
-        alignment="left",
-        font_size=100,
-        color=(109, 105, 115),
-        is_rtl=DEFAULT_IS_RTL,
-    )
-
-    # Save final output.
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+    with profile_render(TEMPLATE_NAME, emit=profile):
+        if cache is not None:
+            cached = render_cached(
+                cache,
+                TEMPLATE_NAME,
+                build_breaking_news_image,
+                params,
+                date_labels,
+                load_plan(TEMPLATE_NAME).assets,
+                output_path,
+                encoder,
+            )
+            return cached.data if output_path is None else None
+
+        base_img = build_breaking_news_image(**params)
+
+        # Save final output.
+        encoded = save_encoded(base_img, output_path, encoder)
+        return encoded.data if output_path is None else None
 
 
 # if __name__ == "__main__":
@@ -154,6 +188,23 @@ if __name__ == "__main__":
         action="store_true",
         help="Indicate if the image is pre-composed (skips base composition).",
     )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Render scale, e.g. 0.5 or 0.25 for a fast draft preview.",
+    )
+    parser.add_argument(
+        "--photo_fit",
+        type=str,
+        default="stretch",
+        choices=PHOTO_FITS,
+        help="How the user image fills its region.",
+    )
+    add_context_arguments(parser)
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    add_encoder_arguments(parser)
     args = parser.parse_args()
 
     create_breaking_news_image(
@@ -163,6 +214,12 @@ if __name__ == "__main__":
         font_size_delta=args.font_size_delta,
         dynamic_font_size=args.dynamic_font_size,
         composed=args.composed,
+        encoder=encoder_from_args(args),
+        scale=args.scale,
+        photo_fit=args.photo_fit,
+        context=context_from_args(args),
+        cache=cache_from_args(args),
+        profile=args.profile,
     )
 
     # python "./src/Craft/breaking_news_template.py" --user_image_path="./assets/user_image.jpg" --headline_text="Breaking News Headline" --output_path="./assets/OutPut/breaking_news_output.png" --dynamic_font_size --composed
@@ -1,25 +1,32 @@
 # date_util.py
 
-from datetime import datetime, timedelta
-from typing import Optional
-from convertdate import persian, islamic
+import operator
+from dataclasses import dataclass
+from datetime import date as civil_date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+from cache_util import CacheInfo, LRUCache
+
+# Default configuration constants
+DEFAULT_DATE_CACHE_SIZE: int = 400  # a year-long table plus a few extra days
+DEFAULT_DATE_TABLE_DAYS: int = 366
+
+_date_bundles = LRUCache(DEFAULT_DATE_CACHE_SIZE)
+# Compiled formatters, keyed by DateFormat and by the raw wrapper arguments. The
+# set of specs a program uses is small and fixed, so this is a plain dict.
+_formatters: Dict[object, "DateFormatter"] = {}
+
+CALENDARS = ("gregorian", "shamsi", "islamic", "weekday")
+DATE_COMPONENTS = ("day", "month", "year")
+
+
+# Western digit -> Farsi digit translation table, built once.
+FARSI_DIGITS = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
 
 
 # Helper: Convert Western digits in a string to Farsi numerals
 def to_farsi_numerals(text: str) -> str:
-    western_to_farsi = {
-        "0": "۰",
-        "1": "۱",
-        "2": "۲",
-        "3": "۳",
-        "4": "۴",
-        "5": "۵",
-        "6": "۶",
-        "7": "۷",
-        "8": "۸",
-        "9": "۹",
-    }
-    return "".join(western_to_farsi.get(ch, ch) for ch in text)
+    return text.translate(FARSI_DIGITS)
 
 
 # Mapping for Farsi names of Gregorian months
@@ -122,6 +129,266 @@ english_to_farsi_weekdays_abbrev = {
 }
 
 
+@dataclass(frozen=True)
+class DateBundle:
+    """
+    Every calendar field and formatted label for one civil day, computed once.
+
+    Labels are keyed '<calendar>_<part>[_<variant>]', where calendar is one of
+    gregorian/shamsi/islamic/weekday. Numbers come in Western ('shamsi_day') and
+    Farsi ('shamsi_day_fa') digits, and months as numbers or names
+    ('shamsi_month_name_fa', 'shamsi_month_name_en').
+    """
+
+    date: civil_date
+    shamsi: Tuple[int, int, int]
+    islamic: Tuple[int, int, int]
+    labels: Dict[str, str]
+
+
+def _civil(date: Union[datetime, civil_date]) -> civil_date:
+    return date.date() if isinstance(date, datetime) else date
+
+
+def _build_bundle(day: civil_date, shamsi_ymd: Optional[Tuple[int, int, int]] = None) -> DateBundle:
+    # convertdate is slow to import; only building a new bundle needs it.
+    from convertdate import islamic, persian
+
+    if shamsi_ymd is None:
+        shamsi_ymd = tuple(persian.from_gregorian(day.year, day.month, day.day))
+    islamic_ymd = tuple(islamic.from_gregorian(day.year, day.month, day.day))
+
+    labels: Dict[str, str] = {}
+    for calendar, (y, m, d) in (
+        ("gregorian", (day.year, day.month, day.day)),
+        ("shamsi", shamsi_ymd),
+        ("islamic", islamic_ymd),
+    ):
+        for part, value in (("year", y), ("month", m), ("day", d)):
+            labels[f"{calendar}_{part}"] = str(value)
+            labels[f"{calendar}_{part}_fa"] = to_farsi_numerals(str(value))
+
+    english_month = day.strftime("%B")
+    labels["gregorian_month_name_en"] = english_month
+    labels["gregorian_month_name_fa"] = farsi_gregorian_months.get(day.month, english_month)
+
+    p_month = shamsi_ymd[1]
+    labels["shamsi_month_name_fa"] = farsi_shamsi_months.get(p_month, str(p_month))
+    labels["shamsi_month_name_en"] = (
+        english_persian_months[p_month - 1] if 1 <= p_month <= 12 else str(p_month)
+    )
+
+    i_month = islamic_ymd[1]
+    in_range = 1 <= i_month <= 12
+    labels["islamic_month_name_fa"] = farsi_islamic_months[i_month - 1] if in_range else str(i_month)
+    labels["islamic_month_name_en"] = english_islamic_months[i_month - 1] if in_range else str(i_month)
+
+    full, short = day.strftime("%A"), day.strftime("%a")
+    labels["weekday_name_en"] = full
+    labels["weekday_short_en"] = short
+    labels["weekday_name_fa"] = english_to_farsi_weekdays.get(full, full)
+    labels["weekday_short_fa"] = english_to_farsi_weekdays_abbrev.get(short, short)
+
+    return DateBundle(date=day, shamsi=shamsi_ymd, islamic=islamic_ymd, labels=labels)
+
+
+def date_bundle(
+    date: Optional[Union[datetime, civil_date]] = None, days_into_future: int = 0
+) -> DateBundle:
+    """
+    Returns the memoized DateBundle for a date (today if None) offset by days_into_future.
+
+    Bundles are keyed by the resulting civil day, so every render on the same
+    day shares one calendar conversion.
+    """
+    if date is None:
+        date = datetime.now()
+    day = _civil(date) + timedelta(days=days_into_future)
+    bundle = _date_bundles.get(day)
+    if bundle is None:
+        bundle = _build_bundle(day)
+        _date_bundles.put(day, bundle)
+    return bundle
+
+
+def _next_shamsi(ymd: Tuple[int, int, int], day: civil_date) -> Tuple[int, int, int]:
+    """Steps a Shamsi date one day forward; day is the Gregorian date being stepped to."""
+    year, month, mday = ymd
+    month_length = 31 if month <= 6 else 30
+    if month < 12 and mday < month_length:
+        return year, month, mday + 1
+    if month < 12:
+        return year, month + 1, 1
+    if mday < 29:
+        return year, month, mday + 1
+    # Esfand has 29 or 30 days depending on the leap year; let convertdate decide.
+    from convertdate import persian
+
+    return tuple(persian.from_gregorian(day.year, day.month, day.day))
+
+
+def precompute_date_table(
+    start: Optional[Union[datetime, civil_date]] = None, days: int = DEFAULT_DATE_TABLE_DAYS
+) -> List[DateBundle]:
+    """
+    Builds the bundles for `days` consecutive days from start (today if None) and
+    stores them in the date cache, growing it if needed.
+
+    Shamsi dates are stepped day by day from a single conversion, so a year-long
+    table costs about two astronomical conversions instead of one per day.
+
+    Returns:
+        list[DateBundle]: One bundle per day, starting at start.
+    """
+    if start is None:
+        start = datetime.now()
+    first = _civil(start)
+    if days > _date_bundles.info().maxsize:
+        _date_bundles.resize(days)
+
+    table: List[DateBundle] = []
+    shamsi_ymd = None
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        if shamsi_ymd is not None:
+            shamsi_ymd = _next_shamsi(shamsi_ymd, day)
+        cached = _date_bundles.get(day)
+        if cached is None:
+            cached = _build_bundle(day, shamsi_ymd)
+            _date_bundles.put(day, cached)
+        shamsi_ymd = cached.shamsi
+        table.append(cached)
+    return table
+
+
+def date_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the date bundle cache."""
+    return _date_bundles.info()
+
+
+def clear_date_cache() -> None:
+    """Drops all cached date bundles and resets the statistics."""
+    _date_bundles.clear()
+
+
+@dataclass(frozen=True)
+class DateFormat:
+    """
+    A date label specification.
+
+    Attributes:
+        calendar: 'gregorian', 'shamsi', 'islamic' or 'weekday'.
+        components: Parts to print, in order, from 'day', 'month' and 'year' (ignored for weekday).
+        language: 'farsi' prints Farsi digits and names; 'english' prints English names;
+                  anything else prints Western digits (and numeric Shamsi months).
+        separator: Text between components.
+        month_format: 'name' or 'number'.
+        short: Abbreviated weekday names.
+    """
+
+    calendar: str
+    components: Tuple[str, ...] = DATE_COMPONENTS
+    language: str = "farsi"
+    separator: str = " "
+    month_format: str = "name"
+    short: bool = False
+
+    def __post_init__(self):
+        if self.calendar not in CALENDARS:
+            raise ValueError(f"calendar must be one of {CALENDARS}, got {self.calendar!r}.")
+        if any(part not in DATE_COMPONENTS for part in self.components):
+            raise ValueError(f"components must be taken from {DATE_COMPONENTS}.")
+        object.__setattr__(self, "components", tuple(self.components))
+        object.__setattr__(self, "language", self.language.lower())
+        object.__setattr__(self, "month_format", self.month_format.lower())
+
+
+class DateFormatter:
+    """
+    A DateFormat compiled to the DateBundle label keys it prints. Calling it
+    only looks up and joins precomputed strings.
+    """
+
+    def __init__(self, spec: DateFormat):
+        self.spec = spec
+        self.keys = _label_keys(spec)
+        if not self.keys:
+            self._format = lambda labels: ""
+        elif len(self.keys) == 1:
+            self._format = operator.itemgetter(self.keys[0])
+        else:
+            getter = operator.itemgetter(*self.keys)
+            join = spec.separator.join
+            self._format = lambda labels: join(getter(labels))
+
+    def format_bundle(self, bundle: DateBundle) -> str:
+        return self._format(bundle.labels)
+
+    def __call__(
+        self, date: Optional[Union[datetime, civil_date]] = None, days_into_future: int = 0
+    ) -> str:
+        return self._format(date_bundle(date, days_into_future).labels)
+
+
+def _label_keys(spec: DateFormat) -> Tuple[str, ...]:
+    lang = spec.language
+    if spec.calendar == "weekday":
+        variant = "short" if spec.short else "name"
+        if lang == "farsi":
+            return (f"weekday_{variant}_fa",)
+        if lang == "english":
+            return (f"weekday_{variant}_en",)
+        return ("weekday_name_en",)
+
+    digits = "_fa" if lang == "farsi" else ""
+    keys = []
+    for part in spec.components:
+        if part != "month":
+            keys.append(f"{spec.calendar}_{part}{digits}")
+        elif spec.month_format != "name":
+            keys.append(f"{spec.calendar}_month{digits}")
+        elif lang == "farsi":
+            keys.append(f"{spec.calendar}_month_name_fa")
+        elif lang == "english" or spec.calendar != "shamsi":
+            keys.append(f"{spec.calendar}_month_name_en")
+        else:
+            keys.append("shamsi_month")
+    return tuple(keys)
+
+
+def compile_date_formatter(spec: DateFormat) -> DateFormatter:
+    """
+    Returns the compiled formatter for a spec. Formatters are cached, so
+    compiling the same spec again is a dictionary lookup.
+    """
+    formatter = _formatters.get(spec)
+    if formatter is None:
+        formatter = _formatters[spec] = DateFormatter(spec)
+    return formatter
+
+
+def _wrapper_formatter(
+    calendar: str,
+    year: bool,
+    month: bool,
+    day: bool,
+    language: str,
+    separator: str = " ",
+    month_format: str = "name",
+    short: bool = False,
+) -> DateFormatter:
+    # Keyed by the raw arguments, so repeated calls skip building a DateFormat.
+    key = (calendar, year, month, day, language, separator, month_format, short)
+    formatter = _formatters.get(key)
+    if formatter is None:
+        components = tuple(
+            part for part, wanted in (("day", day), ("month", month), ("year", year)) if wanted
+        )
+        spec = DateFormat(calendar, components, language, separator, month_format, short)
+        formatter = _formatters[key] = compile_date_formatter(spec)
+    return formatter
+
+
 def georgian(
     year: bool,
     month: bool,
@@ -136,30 +403,8 @@ def georgian(
     Returns a formatted Gregorian date string, offset by a number of days into the future.
     If language is "farsi", numeric parts are converted to Farsi digits.
     """
-    if date is None:
-        date = datetime.now()
-    date += timedelta(days=days_into_future)
-
-    components = []
-    if day:
-        day_str = str(date.day)
-        if language.lower() == "farsi":
-            day_str = to_farsi_numerals(day_str)
-        components.append(day_str)
-    if month:
-        if language.lower() == "english":
-            components.append(date.strftime("%B"))
-        elif language.lower() == "farsi":
-            month_name = farsi_gregorian_months.get(date.month, date.strftime("%B"))
-            components.append(month_name)
-        else:
-            components.append(date.strftime("%B"))
-    if year:
-        year_str = str(date.year)
-        if language.lower() == "farsi":
-            year_str = to_farsi_numerals(year_str)
-        components.append(year_str)
-    return separator.join(components)
+    formatter = _wrapper_formatter("gregorian", year, month, day, language, separator)
+    return formatter(date, days_into_future)
 
 
 def arabic(
@@ -178,41 +423,8 @@ def arabic(
     The month_format parameter allows numeric ("number") or textual ("name") month output.
     Numeric parts are converted to Farsi digits when language is "farsi".
     """
-    if date is None:
-        date = datetime.now()
-    date += timedelta(days=days_into_future)
-
-    i_year, i_month, i_day = islamic.from_gregorian(date.year, date.month, date.day)
-    components = []
-    if day:
-        day_str = str(i_day)
-        if language.lower() == "farsi":
-            day_str = to_farsi_numerals(day_str)
-        components.append(day_str)
-    if month:
-        if month_format.lower() == "name":
-            if language.lower() == "farsi":
-                try:
-                    month_name = farsi_islamic_months[i_month - 1]
-                except IndexError:
-                    month_name = str(i_month)
-            else:
-                try:
-                    month_name = english_islamic_months[i_month - 1]
-                except IndexError:
-                    month_name = str(i_month)
-            components.append(month_name)
-        else:
-            m_str = str(i_month)
-            if language.lower() == "farsi":
-                m_str = to_farsi_numerals(m_str)
-            components.append(m_str)
-    if year:
-        year_str = str(i_year)
-        if language.lower() == "farsi":
-            year_str = to_farsi_numerals(year_str)
-        components.append(year_str)
-    return separator.join(components)
+    formatter = _wrapper_formatter("islamic", year, month, day, language, separator, month_format)
+    return formatter(date, days_into_future)
 
 
 def shamsi(
@@ -229,35 +441,8 @@ def shamsi(
     Returns a formatted Persian (Shamsi) date string, offset by a number of days into the future.
     Numeric parts are converted to Farsi digits when language is "farsi".
     """
-    if date is None:
-        date = datetime.now()
-    date += timedelta(days=days_into_future)
-
-    p_year, p_month, p_day = persian.from_gregorian(date.year, date.month, date.day)
-    components = []
-    if day:
-        day_str = str(p_day)
-        if language.lower() == "farsi":
-            day_str = to_farsi_numerals(day_str)
-        components.append(day_str)
-    if month:
-        if language.lower() == "farsi":
-            month_name = farsi_shamsi_months.get(p_month, str(p_month))
-            components.append(month_name)
-        elif language.lower() == "english":
-            try:
-                month_name = english_persian_months[p_month - 1]
-            except IndexError:
-                month_name = str(p_month)
-            components.append(month_name)
-        else:
-            components.append(str(p_month))
-    if year:
-        year_str = str(p_year)
-        if language.lower() == "farsi":
-            year_str = to_farsi_numerals(year_str)
-        components.append(year_str)
-    return separator.join(components)
+    formatter = _wrapper_formatter("shamsi", year, month, day, language, separator)
+    return formatter(date, days_into_future)
 
 
 def day_of_week(
@@ -271,21 +456,8 @@ def day_of_week(
     Returns the name of the day of the week for a date offset by a given number of days.
     For "farsi", it returns the appropriate mapping.
     """
-    if date is None:
-        date = datetime.now()
-    date += timedelta(days=days_into_future)
-
-    if language.lower() == "english":
-        return date.strftime("%a") if short else date.strftime("%A")
-    elif language.lower() == "farsi":
-        if short:
-            eng_abbrev = date.strftime("%a")
-            return english_to_farsi_weekdays_abbrev.get(eng_abbrev, eng_abbrev)
-        else:
-            eng_full = date.strftime("%A")
-            return english_to_farsi_weekdays.get(eng_full, eng_full)
-    else:
-        return date.strftime("%A")
+    formatter = _wrapper_formatter("weekday", False, False, False, language, short=short)
+    return formatter(date, days_into_future)
 
 
 def clock_time(
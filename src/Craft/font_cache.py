@@ -0,0 +1,97 @@
+# font_cache.py
+
+# External dependencies required:
+# - Pillow: pip install Pillow
+
+import io
+import os
+from typing import Dict, Iterable, Union
+
+from PIL import ImageFont
+
+from cache_util import CacheInfo, LRUCache
+from render_profile import count
+
+# Default configuration constants
+DEFAULT_FONT_CACHE_SIZE: int = 128  # sized FreeTypeFont objects
+DEFAULT_FONT_FILE_CACHE_SIZE: int = 32  # raw font files kept in memory
+DEFAULT_LAYOUT_ENGINE = ImageFont.Layout.RAQM
+
+_font_files = LRUCache(DEFAULT_FONT_FILE_CACHE_SIZE)
+_fonts = LRUCache(DEFAULT_FONT_CACHE_SIZE)
+
+
+def _font_key(font_path: str) -> str:
+    return os.path.abspath(font_path)
+
+
+def load_font_bytes(font_path: str) -> bytes:
+    """
+    Returns the raw contents of a font file, reading it from disk only once.
+
+    Args:
+        font_path (str): Path to the TrueType/OpenType font file.
+
+    Returns:
+        bytes: The font file contents.
+    """
+
+    def read() -> bytes:
+        with open(font_path, "rb") as f:
+            return f.read()
+
+    return _font_files.get_or_create(_font_key(font_path), read)
+
+
+def get_font(
+    font_path: str,
+    font_size: Union[int, float],
+    layout_engine: ImageFont.Layout = DEFAULT_LAYOUT_ENGINE,
+) -> ImageFont.FreeTypeFont:
+    """
+    Returns a shared FreeTypeFont for (font_path, font_size, layout_engine).
+
+    Font objects are immutable once created, so the same instance is handed to
+    every caller. The least recently used sizes are evicted once the cache is full.
+
+    Args:
+        font_path (str): Path to the TrueType/OpenType font file.
+        font_size (int or float): Font size in pixels.
+        layout_engine (ImageFont.Layout): Pillow layout engine (default RAQM).
+
+    Returns:
+        ImageFont.FreeTypeFont: The sized font.
+    """
+    key = (_font_key(font_path), font_size, layout_engine)
+
+    def load() -> ImageFont.FreeTypeFont:
+        count("fonts_loaded")
+        return ImageFont.truetype(
+            io.BytesIO(load_font_bytes(font_path)),
+            font_size,
+            layout_engine=layout_engine,
+        )
+
+    return _fonts.get_or_create(key, load)
+
+
+def preload_fonts(font_paths: Iterable[str]) -> None:
+    """Reads the given font files into memory ahead of the first render."""
+    for font_path in font_paths:
+        load_font_bytes(font_path)
+
+
+def font_cache_info() -> Dict[str, CacheInfo]:
+    """Returns hit/miss statistics for the sized-font and font-file caches."""
+    return {"fonts": _fonts.info(), "files": _font_files.info()}
+
+
+def set_font_cache_size(max_fonts: int) -> None:
+    """Changes how many sized font objects are kept."""
+    _fonts.resize(max_fonts)
+
+
+def clear_font_cache() -> None:
+    """Drops all cached fonts and font files and resets the statistics."""
+    _fonts.clear()
+    _font_files.clear()
@@ -0,0 +1,302 @@
+# image_encoder.py
+
+import io
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from img_util import OutputTarget
+from render_profile import stage, timed
+
+# Supported output formats (Pillow format names).
+ENCODER_FORMATS = ("JPEG", "WEBP")
+
+# Default configuration constants
+DEFAULT_QUALITY: int = 95
+DEFAULT_MIN_QUALITY: int = 40
+DEFAULT_PREVIEW_QUALITY: int = 80
+PREVIEW_SUFFIX: str = ".preview"
+
+
+@dataclass(frozen=True)
+class EncoderSettings:
+    """
+    How a rendered image is encoded. The defaults reproduce the templates'
+    original output: a baseline quality-95 JPEG.
+
+    Attributes:
+        format: 'JPEG' or 'WEBP'.
+        quality: Encoder quality (1-95 for JPEG, 0-100 for WebP). With max_bytes
+                 set this is the upper bound of the quality search.
+        progressive: Write a progressive JPEG.
+        optimize: Compute optimal Huffman tables for JPEG (smaller, slower).
+        subsampling: JPEG chroma subsampling: 0 = 4:4:4, 1 = 4:2:2, 2 = 4:2:0.
+                     None keeps Pillow's default for the quality.
+        webp_method: WebP effort from 0 (fast) to 6 (smallest).
+        max_bytes: If set, the highest quality between min_quality and quality
+                   whose output fits in this many bytes is used.
+        min_quality: Lowest quality the max_bytes search may go down to.
+        preview_max_side: If set, a downscaled preview whose longest side is at
+                          most this many pixels is encoded as well.
+        preview_quality: Quality of the preview.
+    """
+
+    format: str = "JPEG"
+    quality: int = DEFAULT_QUALITY
+    progressive: bool = False
+    optimize: bool = False
+    subsampling: Optional[int] = None
+    webp_method: int = 4
+    max_bytes: Optional[int] = None
+    min_quality: int = DEFAULT_MIN_QUALITY
+    preview_max_side: Optional[int] = None
+    preview_quality: int = DEFAULT_PREVIEW_QUALITY
+
+    def __post_init__(self):
+        fmt = self.format.upper()
+        if fmt == "JPG":
+            fmt = "JPEG"
+        if fmt not in ENCODER_FORMATS:
+            raise ValueError(f"format must be one of {ENCODER_FORMATS}, got {self.format!r}.")
+        object.__setattr__(self, "format", fmt)
+        if not 1 <= self.min_quality <= self.quality <= 100:
+            raise ValueError("expected 1 <= min_quality <= quality <= 100.")
+        if self.subsampling not in (None, 0, 1, 2):
+            raise ValueError("subsampling must be None, 0, 1 or 2.")
+        if self.max_bytes is not None and self.max_bytes < 1:
+            raise ValueError("max_bytes must be positive.")
+        if self.preview_max_side is not None and self.preview_max_side < 1:
+            raise ValueError("preview_max_side must be positive.")
+
+
+DEFAULT_ENCODER = EncoderSettings()
+
+
+@dataclass
+class EncodeReport:
+    """Statistics of one encode, for job results and logs."""
+
+    format: str
+    quality: int
+    bytes: int
+    width: int
+    height: int
+    encode_ms: float
+    attempts: int = 1
+    target_met: Optional[bool] = None
+    preview_bytes: Optional[int] = None
+    preview_path: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class EncodedImage:
+    """Encoded output bytes, the optional preview, and the encode statistics."""
+
+    data: bytes
+    preview: Optional[bytes]
+    report: EncodeReport
+
+
+def _save_options(settings: EncoderSettings, quality: int) -> Dict[str, Any]:
+    if settings.format == "WEBP":
+        return {"quality": quality, "method": settings.webp_method}
+    options: Dict[str, Any] = {
+        "quality": quality,
+        "progressive": settings.progressive,
+        "optimize": settings.optimize,
+    }
+    if settings.subsampling is not None:
+        options["subsampling"] = settings.subsampling
+    return options
+
+
+def _encode(img: Image.Image, settings: EncoderSettings, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=settings.format, **_save_options(settings, quality))
+    return buffer.getvalue()
+
+
+def _encode_to_size(img: Image.Image, settings: EncoderSettings):
+    """
+    Binary-searches the highest quality whose output fits settings.max_bytes.
+    Output size grows with quality, so the search needs about log2(range) encodes.
+
+    Returns:
+        tuple: (data, quality, attempts, target_met). When even min_quality is
+               too large, the min_quality output is returned with target_met False.
+    """
+    encoded: Dict[int, bytes] = {}
+
+    def size_at(quality: int) -> int:
+        if quality not in encoded:
+            encoded[quality] = _encode(img, settings, quality)
+        return len(encoded[quality])
+
+    if size_at(settings.quality) <= settings.max_bytes:
+        return encoded[settings.quality], settings.quality, 1, True
+
+    low, high = settings.min_quality, settings.quality - 1
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        if size_at(mid) <= settings.max_bytes:
+            best = mid
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    if best is None:
+        size_at(settings.min_quality)
+        return encoded[settings.min_quality], settings.min_quality, len(encoded), False
+    return encoded[best], best, len(encoded), True
+
+
+def make_preview(img: Image.Image, max_side: int) -> Image.Image:
+    """
+    Returns a copy of img downscaled so its longest side is at most max_side pixels.
+    """
+    preview = img.copy()
+    preview.thumbnail((max_side, max_side), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    return preview
+
+
+@timed("encode")
+def encode_image(img: Image.Image, settings: Optional[EncoderSettings] = None) -> EncodedImage:
+    """
+    Encodes a rendered image (and its preview, if configured) in memory.
+
+    Args:
+        img: The rendered image; converted to RGB before encoding.
+        settings: Encoder settings. Defaults to a quality-95 JPEG.
+
+    Returns:
+        EncodedImage: The encoded bytes, the preview bytes (or None) and a report.
+    """
+    settings = settings or DEFAULT_ENCODER
+    start = time.perf_counter()
+
+    rgb_img = img if img.mode == "RGB" else img.convert("RGB")
+    if settings.max_bytes is None:
+        data = _encode(rgb_img, settings, settings.quality)
+        quality, attempts, target_met = settings.quality, 1, None
+    else:
+        data, quality, attempts, target_met = _encode_to_size(rgb_img, settings)
+
+    preview = None
+    if settings.preview_max_side is not None:
+        preview = _encode(
+            make_preview(rgb_img, settings.preview_max_side), settings, settings.preview_quality
+        )
+
+    report = EncodeReport(
+        format=settings.format,
+        quality=quality,
+        bytes=len(data),
+        width=rgb_img.width,
+        height=rgb_img.height,
+        encode_ms=round((time.perf_counter() - start) * 1000, 3),
+        attempts=attempts,
+        target_met=target_met,
+        preview_bytes=len(preview) if preview is not None else None,
+    )
+    return EncodedImage(data=data, preview=preview, report=report)
+
+
+def preview_path_for(path: str) -> str:
+    """Returns the preview path stored next to an output file: 'a/out.jpg' -> 'a/out.preview.jpg'."""
+    root, ext = os.path.splitext(path)
+    return f"{root}{PREVIEW_SUFFIX}{ext}"
+
+
+def write_output(
+    data: bytes, output: OutputTarget, preview: Optional[bytes] = None
+) -> Optional[str]:
+    """
+    Writes encoded bytes to a file path or writable binary buffer. For paths,
+    a preview is written next to the file (see preview_path_for).
+
+    Returns:
+        The preview path if one was written, otherwise None.
+    """
+    if not isinstance(output, (str, os.PathLike)):
+        output.write(data)
+        return None
+
+    path = os.fspath(output)
+    with open(path, "wb") as f:
+        f.write(data)
+    if preview is None:
+        return None
+    preview_path = preview_path_for(path)
+    with open(preview_path, "wb") as f:
+        f.write(preview)
+    return preview_path
+
+
+def save_encoded(
+    img: Image.Image,
+    output: Optional[OutputTarget],
+    settings: Optional[EncoderSettings] = None,
+) -> EncodedImage:
+    """
+    Encodes a rendered image and writes it to a file path or writable binary buffer.
+
+    When the settings ask for a preview and output is a path, the preview is
+    written next to it (see preview_path_for). For buffers, or when output is
+    None, nothing is written and the caller takes the bytes from the result.
+
+    Args:
+        img: The rendered image.
+        output: File path, writable binary buffer, or None.
+        settings: Encoder settings. Defaults to a quality-95 JPEG.
+
+    Returns:
+        EncodedImage: The encoded bytes, the preview bytes and the report.
+    """
+    encoded = encode_image(img, settings)
+    if output is not None:
+        with stage("write"):
+            encoded.report.preview_path = write_output(encoded.data, output, encoded.preview)
+    return encoded
+
+
+def add_encoder_arguments(parser) -> None:
+    """Adds the output-encoding options shared by the template CLIs to an argparse parser."""
+    parser.add_argument(
+        "--format", type=str, default="JPEG", choices=ENCODER_FORMATS, help="Output format."
+    )
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="Encoder quality.")
+    parser.add_argument("--progressive", action="store_true", help="Write a progressive JPEG.")
+    parser.add_argument(
+        "--optimize", action="store_true", help="Optimize JPEG Huffman tables (smaller, slower)."
+    )
+    parser.add_argument(
+        "--max_bytes",
+        type=int,
+        default=None,
+        help="Lower the quality until the output fits in this many bytes.",
+    )
+    parser.add_argument(
+        "--preview_max_side",
+        type=int,
+        default=None,
+        help="Also write a downscaled '.preview' file with this longest side.",
+    )
+
+
+def encoder_from_args(args) -> EncoderSettings:
+    """Builds EncoderSettings from arguments added by add_encoder_arguments."""
+    return EncoderSettings(
+        format=args.format,
+        quality=args.quality,
+        progressive=args.progressive,
+        optimize=args.optimize,
+        max_bytes=args.max_bytes,
+        preview_max_side=args.preview_max_side,
+    )
@@ -1,8 +1,210 @@
 # img_util.py
 
-from PIL import Image, ImageEnhance, ImageStat
-from typing import Union, Tuple, Optional
+import io
+import math
+import os
+from PIL import Image
+from typing import BinaryIO, Union, Tuple, Optional
 
+from cache_util import CacheInfo, LRUCache
+from render_profile import count, stage, timed
+
+# Default configuration constants
+DEFAULT_TEMPLATE_CACHE_SIZE: int = 32  # room for each template at a few preview scales
+DEFAULT_WATERMARK_CACHE_SIZE: int = 8
+
+_template_images = LRUCache(DEFAULT_TEMPLATE_CACHE_SIZE)
+_prepared_watermarks = LRUCache(DEFAULT_WATERMARK_CACHE_SIZE)
+
+# How a user photo is fitted into its slot.
+PHOTO_FITS = ("stretch", "cover", "contain")
+
+# Where an image can be read from, and where an encoded image can be written to.
+ImageSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO]
+OutputTarget = Union[str, "os.PathLike[str]", BinaryIO]
+
+
+def open_image(source: ImageSource) -> Image.Image:
+    """
+    Opens an image from a path, from encoded bytes, or from a binary file-like object.
+
+    Args:
+        source: File path, encoded image bytes (bytes/bytearray/memoryview) or a readable binary stream.
+
+    Returns:
+        The opened (lazily decoded) PIL.Image.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def scale_value(value: float, scale: float) -> int:
+    """Converts a full-resolution template coordinate or size to whole pixels at a render scale."""
+    return int(round(value * scale))
+
+
+def scale_box(box: Tuple[float, ...], scale: float) -> Tuple[int, ...]:
+    """Scales every coordinate of a full-resolution box or position."""
+    return tuple(scale_value(value, scale) for value in box)
+
+
+def check_scale(scale: float) -> None:
+    """Raises ValueError unless 0 < scale <= 1."""
+    if not 0 < scale <= 1:
+        raise ValueError(f"scale must be in (0, 1], got {scale!r}.")
+
+
+def scale_image(img: Image.Image, scale: float) -> Image.Image:
+    """
+    Downscales a full-resolution image to a render scale; img itself is returned at scale 1.
+
+    The reducing resize box-averages by the whole factor first (exactly, for 1/2
+    and 1/4), which is several times cheaper than filtering the full canvas.
+    """
+    if scale == 1:
+        return img
+    size = scale_box(img.size, scale)
+    img.draft(None, size)  # JPEG only: let the decoder do the first 1/2-1/8 of the reduction
+    if img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGBA")
+    return img.resize(size, reducing_gap=1.0)
+
+
+def _is_opaque(img: Image.Image) -> bool:
+    return img.mode not in ("RGBA", "LA", "PA", "RGBa", "La") and "transparency" not in img.info
+
+
+def load_photo(
+    source: ImageSource, size: Tuple[int, int], fit: str = "stretch"
+) -> Image.Image:
+    """
+    Decodes a user photo straight to the size it is pasted at.
+
+    JPEGs are decoded in draft mode at the smallest DCT scale (1/2, 1/4 or 1/8)
+    that still covers the target, and the remaining reduction is a reducing
+    resize. Opaque photos stay RGB; only photos with transparency become RGBA.
+
+    Args:
+        source: Path, encoded bytes or binary file-like object.
+        size: Target (width, height) of the photo slot.
+        fit: 'stretch' resizes to exactly size, ignoring the aspect ratio;
+             'cover' scales to fill size and center-crops the overflow;
+             'contain' scales to fit inside size, so one side may be shorter.
+
+    Returns:
+        The photo in RGB or RGBA mode.
+    """
+    if fit not in PHOTO_FITS:
+        raise ValueError(f"fit must be one of {PHOTO_FITS}, got {fit!r}.")
+    with stage("photo.decode"):
+        img = open_image(source)
+        target_w, target_h = size
+        width, height = img.size
+
+        if fit == "stretch":
+            factor_w, factor_h = target_w / width, target_h / height
+        else:
+            pick = max if fit == "cover" else min
+            factor_w = factor_h = pick(target_w / width, target_h / height)
+        img.draft(None, (max(1, math.ceil(width * factor_w)), max(1, math.ceil(height * factor_h))))
+
+        if not _is_opaque(img):
+            img = img.convert("RGBA")
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        else:
+            img.load()
+
+    # Draft decoding may have shrunk the image; factors are relative to the original size.
+    shrink = img.width / width
+    crop = None
+    if fit == "cover":
+        crop_w, crop_h = target_w / factor_w * shrink, target_h / factor_h * shrink
+        # Clamp: float error can push a full-height/width crop a hair outside the image.
+        left, top = max(0.0, (img.width - crop_w) / 2), max(0.0, (img.height - crop_h) / 2)
+        crop = (left, top, min(img.width, left + crop_w), min(img.height, top + crop_h))
+    elif fit == "contain":
+        size = (max(1, round(width * factor_w)), max(1, round(height * factor_h)))
+    with stage("photo.resize"):
+        return img.resize(size, Image.Resampling.BICUBIC, box=crop, reducing_gap=3.0)
+
+
+def paste_photo(
+    base_img: Image.Image,
+    source: ImageSource,
+    box: Tuple[int, int, int, int],
+    fit: str = "stretch",
+) -> None:
+    """
+    Loads a user photo with load_photo and pastes it into box (left, top, right, bottom)
+    of base_img. A 'contain' photo is centered in the box.
+    """
+    left, top, right, bottom = box
+    photo = load_photo(source, (right - left, bottom - top), fit)
+    position = (left + (right - left - photo.width) // 2, top + (bottom - top - photo.height) // 2)
+    base_img.paste(photo, position, photo if photo.mode == "RGBA" else None)
+
+
+def load_template_image(path: str, scale: float = 1.0) -> Image.Image:
+    """
+    Returns a template PNG decoded to RGBA, decoding each file only once.
+
+    Entries are keyed by path (and scale) and reloaded when the file's mtime
+    changes. The returned image is shared between renders: copy() it before
+    drawing on it.
+
+    Args:
+        path: File path to the template image.
+        scale: Render scale; anything below 1 returns a downscaled copy that
+               is itself cached, so previews never resize the full template twice.
+
+    Returns:
+        The cached RGBA image.
+    """
+    key = os.path.abspath(path)
+    if scale != 1:
+        key = (key, scale)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _template_images.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    if scale != 1:
+        check_scale(scale)
+        full = load_template_image(path)
+        image = full.resize(
+            scale_box(full.size, scale), Image.Resampling.LANCZOS, reducing_gap=2.0
+        )
+    else:
+        with Image.open(path) as img:
+            image = img.convert("RGBA")
+    count("templates_decoded")
+    _template_images.put(key, (mtime, image))
+    return image
+
+
+def template_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the template image cache."""
+    return _template_images.info()
+
+
+def clear_template_cache() -> None:
+    """Drops all cached template images and resets the statistics."""
+    _template_images.clear()
+
+
+def watermark_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the prepared watermark cache."""
+    return _prepared_watermarks.info()
+
+
+def clear_watermark_cache() -> None:
+    """Drops all prepared watermarks and resets the statistics."""
+    _prepared_watermarks.clear()
+
+
+@timed("watermark")
 def apply_watermark(
     base_img: Union[str, Image.Image],
     watermark: Union[str, Image.Image],
@@ -12,6 +214,7 @@ def apply_watermark(
     color: Optional[Union[str, Tuple[int, int, int]]] = None,
     adaptive_color: bool = False,
     brightness_threshold: int = 128,
+    in_place: bool = False,
 ) -> Image.Image:
     """
     Apply a watermark to a base image with multiple customization options.
@@ -29,9 +232,11 @@ def apply_watermark(
         adaptive_color: If True, analyze the area under the watermark and adjust its color:
                         for a bright background, a dark (e.g., black) watermark is used, and vice versa.
         brightness_threshold: The brightness level (0–255) used to decide which color to choose in adaptive mode.
-    
+        in_place: If True and base_img is an RGBA image owned by the caller, draw the watermark
+                  directly onto it instead of onto a full-size copy.
+
     Returns:
-        A new PIL.Image object with the watermark applied.
+        A PIL.Image object with the watermark applied (base_img itself when drawn in place).
     """
     # Determine the appropriate resampling filter.
     try:
@@ -40,72 +245,92 @@ def apply_watermark(
         resample_method = Image.ANTIALIAS
 
     # Load base image if a path is provided, and ensure it's in RGBA mode.
+    # A freshly loaded or converted image is ours, so it never needs another copy.
     if isinstance(base_img, str):
         base_img = Image.open(base_img).convert("RGBA")
-    else:
+        in_place = True
+    elif base_img.mode != "RGBA":
         base_img = base_img.convert("RGBA")
-    
+        in_place = True
+
     # Load watermark image if a path is provided, and ensure it's in RGBA mode.
+    # Watermarks given by path come from the template cache and are prepared once per size.
+    watermark_key = None
     if isinstance(watermark, str):
-        watermark = Image.open(watermark).convert("RGBA")
-    else:
+        watermark_key = (os.path.abspath(watermark), os.stat(watermark).st_mtime_ns)
+        watermark = load_template_image(watermark)
+    elif watermark.mode != "RGBA":
         watermark = watermark.convert("RGBA")
-    
+
     # Determine the watermark size and position.
     if len(position) == 4:
         # Position provided as (x, y, width, height): force resize.
         x, y, w, h = position
-        watermark = watermark.resize((w, h), resample=resample_method)
-        pos = (x, y)
-        region_box = (x, y, x + w, y + h)
+        size = (w, h)
     elif len(position) == 2:
         # Position provided as (x, y): use scale to resize watermark.
         x, y = position
         orig_w, orig_h = watermark.size
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        watermark = watermark.resize((new_w, new_h), resample=resample_method)
-        pos = (x, y)
-        region_box = (x, y, x + new_w, y + new_h)
+        size = (int(orig_w * scale), int(orig_h * scale))
     else:
         raise ValueError("position must be a tuple of length 2 or 4")
-    
-    # Adaptive color: analyze the underlying area in the base image.
+    pos = (x, y)
+    region_box = (x, y, x + size[0], y + size[1])
+
+    # Adaptive color: analyze only the area under the watermark.
     if adaptive_color:
-        # Crop the region where the watermark will be placed.
-        region = base_img.crop(region_box)
-        # Convert to grayscale to analyze brightness.
-        gray = region.convert("L")
-        stat = ImageStat.Stat(gray)
-        avg_brightness = stat.mean[0]
+        avg_brightness = region_brightness(base_img, region_box)
         # Choose a contrasting tint:
         # For a bright background use a dark (black) watermark, otherwise white.
         adaptive_tint = (0, 0, 0) if avg_brightness > brightness_threshold else (255, 255, 255)
         if color is None:
             color = adaptive_tint
 
-    # If a color is provided (or chosen adaptively), tint the watermark.
-    if color is not None:
-        # Create a new image filled with the desired color and use the watermark's alpha channel.
-        colored_watermark = Image.new("RGBA", watermark.size, color)
-        # Extract the original alpha channel.
-        alpha = watermark.split()[-1]
-        colored_watermark.putalpha(alpha)
-        watermark = colored_watermark
-
-    # Adjust the watermark opacity.
-    if opacity < 1:
-        alpha = watermark.split()[-1]
-        # Enhance the brightness of the alpha channel to adjust opacity.
-        alpha = ImageEnhance.Brightness(alpha).enhance(opacity)
-        watermark.putalpha(alpha)
-    
-    # Paste the watermark onto a copy of the base image.
-    result = base_img.copy()
-    result.paste(watermark, pos, mask=watermark)
-    
+    # The tint is painted at paste time, so black and white share one prepared mask.
+    tinted = color is not None
+
+    def prepare() -> Tuple[Optional[Image.Image], Image.Image]:
+        resized = watermark.resize(size, resample=resample_method)
+        # Scale the alpha channel by the opacity in a single lookup-table pass.
+        mask = resized.getchannel("A")
+        if opacity < 1:
+            mask = mask.point(_opacity_table(opacity))
+        if tinted:
+            return None, mask
+        resized.putalpha(mask)
+        return resized, mask
+
+    if watermark_key is None:
+        prepared, mask = prepare()
+    else:
+        prepared, mask = _prepared_watermarks.get_or_create(
+            watermark_key + (size, opacity, tinted), prepare
+        )
+
+    result = base_img if in_place else base_img.copy()
+    if tinted:
+        # A tinted watermark is just the color painted through its alpha mask.
+        result.paste(color, region_box, mask=mask)
+    else:
+        result.paste(prepared, pos, mask=mask)
+
     return result
 
+
+def region_brightness(img: Image.Image, box: Tuple[int, int, int, int]) -> float:
+    """
+    Returns the average luminance (0–255) of a region, converting only that region.
+    """
+    from PIL import ImageStat  # only adaptive-color watermarks need it
+
+    return ImageStat.Stat(img.crop(box).convert("L")).mean[0]
+
+
+def _opacity_table(opacity: float) -> list:
+    # Same rounding as scaling the band with ImageEnhance.Brightness.
+    return [int(value * opacity) for value in range(256)]
+
+
 # Example usage of the apply_watermark function.
 if __name__ == "__main__":
     # Replace these paths with valid image file paths on your system.
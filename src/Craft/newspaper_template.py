@@ -1,19 +1,93 @@
-from PIL import Image, ImageDraw
-from datetime import datetime, timedelta
-from text_utils import draw_text_no_box, draw_text_in_box
-from date_util import shamsi, arabic, georgian, day_of_week
-from img_util import apply_watermark
-from typing import Optional
+from PIL import Image
+from render_context import (
+    RenderContext,
+    add_context_arguments,
+    context_from_args,
+)
+from img_util import (
+    PHOTO_FITS,
+    ImageSource,
+    OutputTarget,
+)
+from image_encoder import (
+    EncoderSettings,
+    add_encoder_arguments,
+    encoder_from_args,
+    save_encoded,
+)
+from render_cache import RenderCache, add_cache_arguments, cache_from_args, render_cached
+from render_profile import add_profile_arguments, profile_render
+from template_engine import load_plan
+from typing import Dict, Optional
 import argparse
 
-DEFAULT_IS_RTL: bool = False
+# The layout lives in template_specs/newspaper.json. Its plan is loaded on first
+# use and reloaded when the spec changes, so read base, fonts and assets from
+# load_plan(TEMPLATE_NAME) rather than keeping copies.
+TEMPLATE_NAME = "newspaper"
+
+
+def date_labels(context: RenderContext, days_into_future: int = 0) -> Dict[str, str]:
+    """
+    Returns the date texts the newspaper draws for a render context.
+
+    Returns:
+        dict: Text per date slot ('persian_day', 'persian_month_year', 'arabic_date',
+              'english_date', 'weekday').
+    """
+    return load_plan(TEMPLATE_NAME).date_labels(context, days_into_future)
+
+
+def build_newspaper_image(
+    user_image_path: ImageSource,
+    overline_text: str,
+    main_headline_text: str,
+    event1_text: Optional[str] = None,
+    event2_text: Optional[str] = None,
+    event3_text: Optional[str] = None,
+    days_into_future: int = 0,
+    dynamic_font_size: bool = True,
+    overline_font_size_delta: int = 0,
+    main_headline_font_size_delta: int = 0,
+    watermark: bool = True,
+    composed: bool = False,
+    scale: float = 1.0,
+    photo_fit: str = "stretch",
+    context: Optional[RenderContext] = None,
+) -> Image.Image:
+    """
+    Renders the newspaper-style image in memory without encoding it.
+
+    Takes the same arguments as create_newspaper_image, minus output_path and encoder.
+    The layout is the 'newspaper' template spec (see template_engine).
+
+    Returns:
+        Image.Image: The finished RGBA image.
+    """
+    return load_plan(TEMPLATE_NAME).render(
+        user_image_path,
+        composed=composed,
+        scale=scale,
+        photo_fit=photo_fit,
+        context=context,
+        days_into_future=days_into_future,
+        overline_text=overline_text,
+        main_headline_text=main_headline_text,
+        event1_text=event1_text,
+        event2_text=event2_text,
+        event3_text=event3_text,
+        dynamic_font_size=dynamic_font_size,
+        overline_font_size_delta=overline_font_size_delta,
+        main_headline_font_size_delta=main_headline_font_size_delta,
+        watermark=watermark,
+    )
 
 
 def create_newspaper_image(
-    user_image_path: str,
+    user_image_path: ImageSource,
     overline_text: str,
     main_headline_text: str,
-    output_path: str,
+    output_path: Optional[OutputTarget],
     event1_text: Optional[str] = None,
     event2_text: Optional[str] = None,
     event3_text: Optional[str] = None,
@@ -22,8 +96,14 @@ def create_newspaper_image(
     overline_font_size_delta: int = 0,
     main_headline_font_size_delta: int = 0,
     watermark: bool = True,
-    composed: bool = False, 
-) -> None:
+    composed: bool = False,
+    encoder: Optional[EncoderSettings] = None,
+    scale: float = 1.0,
+    photo_fit: str = "stretch",
+    context: Optional[RenderContext] = None,
+    cache: Optional[RenderCache] = None,
+    profile: bool = False,
+) -> Optional[bytes]:
     """
     Creates a customized newspaper-style image by adding dynamic texts, events, and an optional watermark.
 
@@ -32,10 +112,12 @@ def create_newspaper_image(
     Otherwise, the function loads the base template, pastes the user image, and composites event overlays.
 
     Args:
-        user_image_path: Path to the user image or a pre-composed base image.
+        user_image_path: Path to the user image or a pre-composed base image. Encoded image
+                         bytes or a binary file-like object are accepted too.
         overline_text: Small header above the main headline.
         main_headline_text: Primary headline text.
-        output_path: File path to save the generated image.
+        output_path: File path or writable binary buffer to save the generated image to.
+                     If None, the encoded image is returned instead.
         event1_text, event2_text, event3_text: Event descriptions (optional).
         days_into_future: Days offset for the displayed date.
         dynamic_font_size: Enable dynamic font sizing.
@@ -43,166 +125,59 @@ def create_newspaper_image(
         main_headline_font_size_delta: Adjustment to default main headline font size.
         watermark: If True, applies a watermark on the final image.
         composed: If True, the base image is assumed to be already composed (user image and event overlays applied).
-    """
-    # Always compute event texts and count
-    event_texts = [e for e in [event1_text, event2_text, event3_text] if e]
-    num_events = len(event_texts)
-
-    if composed:
-        # Use the pre-composed image provided by the user.
-        base_img = Image.open(user_image_path).convert("RGBA")
-        draw = ImageDraw.Draw(base_img)
-    else:
-        # Load the base template and compose it with the user image and event overlays.
-        base_img = Image.open("./assets/templates/News Paper/Base.png").convert("RGBA")
-        draw = ImageDraw.Draw(base_img)
-
-        # Load and paste user image.
-        user_img = Image.open(user_image_path).convert("RGBA")
-        alpha = 236
-        user_img_resized = user_img.resize((16 * alpha, 9 * alpha))
-        base_img.paste(user_img_resized, (150, 1550), user_img_resized)
-
-        # Composite event overlay based on number of events.
-        overlay_img = Image.open(
-            f"./assets/templates/News Paper/Event{num_events}.png"
-        ).convert("RGBA")
-        base_img = Image.alpha_composite(base_img, overlay_img)
-        draw = ImageDraw.Draw(base_img)
-
-    # Define individual font paths.
-    fonts = {
-        "overline": "./assets/Font/BNazanin.ttf",
-        "headline": "./assets/Font/Ray-ExtraBlack.ttf",
-        "arabic_date": "./assets/Font/Sahel-FD.ttf",
-        "english_date": "./assets/Font/Poppins-Regular.ttf",
-        "weekday": "./assets/Font/Sahel-FD.ttf",
-        "persian_day": "./assets/Font/B Titr Bold_0.ttf",
-        "persian_month_year": "./assets/Font/Sahel-FD.ttf",
-        "events": "./assets/Font/Sahel-FD.ttf",
-    }
-
-    # Add overline text.
-    overline_size = 180 + overline_font_size_delta
-    draw_text_no_box(
-        draw,
-        overline_text,
-        fonts["overline"],
-        base_img.width // 2,
-        750,
-        alignment="center",
-        font_size=overline_size,
-        color="black",
-        is_rtl=False,
-    )
-
-    # Add main headline text.
-    margin = 100
-    headline_box = (margin, 980, base_img.width - 2 * margin, 550)
-    headline_size = 160 + main_headline_font_size_delta
-    draw_text_in_box(
-        draw,
-        main_headline_text,
-        fonts["headline"],
-        headline_box,
-        alignment="center",
-        vertical_mode="top_to_bottom",
-        auto_size=dynamic_font_size,
-        font_size=headline_size,
-        color="black",
-        is_rtl=False,
-    )
-
-    # Draw event texts.
-    event_y_positions_dict = {1: [255], 2: [230, 340], 3: [150, 260, 370]}
-    event_y_positions = event_y_positions_dict.get(num_events, [])
-    event_font_size = 70
-    for idx, event_text in enumerate(event_texts):
-        draw_text_no_box(
-            draw,
-            event_text,
-            fonts["events"],
-            940,
-            event_y_positions[idx],
-            alignment="right",
-            font_size=event_font_size,
-            color="black",
-            is_rtl=False,
-        )
-
-    # Define positions for dates.
-    x_anchor = 1400 if num_events else 540
-    y_offset = -30
-    positions = {
-        "weekday": (x_anchor, 60),
-        "persian_day": (x_anchor, 240 + y_offset),
-        "persian_month_year": (x_anchor, 380 + y_offset),
-        "arabic_date": (x_anchor, 480 + y_offset),
-        "english_date": (x_anchor, 580 + y_offset),
-    }
-    date_font_size = 70
+        encoder: Output encoding (format, quality, size target, preview). Defaults to a quality-95 JPEG.
+        scale: Render scale in (0, 1]. 0.5 or 0.25 renders a draft preview with every coordinate
+               and font size scaled to match; 1 is the final full-resolution render.
+        photo_fit: How the user image fills its slot: 'stretch' (default, ignores the aspect ratio),
+                   'cover' (fill and center-crop) or 'contain' (fit inside, centered).
+        context: The moment the dates are drawn for. Defaults to now; pass a fixed
+                 RenderContext to get byte-identical output for the same inputs.
+        cache: Optional RenderCache. Identical inputs (photo, texts, flags, drawn dates,
+               template assets, encoder and code) return the stored image without rendering.
+        profile: If True, write per-stage timings and call counts of this render as JSON
+                 to stderr (see render_profile; CRAFT_PROFILE=1 does the same for every render).
 
-    # Draw date texts.
-    draw_text_no_box(
-        draw,
-        shamsi(year=False, month=False, day=True, days_into_future=days_into_future),
-        fonts["persian_day"],
-        *positions["persian_day"],
-        alignment="center",
-        font_size=date_font_size * 2.3,
-    )
-    draw_text_no_box(
-        draw,
-        shamsi(year=True, month=True, day=False, days_into_future=days_into_future),
-        fonts["persian_month_year"],
-        *positions["persian_month_year"],
-        alignment="center",
-        font_size=date_font_size,
-        is_rtl=DEFAULT_IS_RTL,
-    )
-    draw_text_no_box(
-        draw,
-        arabic(year=True, month=True, day=True, days_into_future=days_into_future),
-        fonts["arabic_date"],
-        *positions["arabic_date"],
-        alignment="center",
-        font_size=date_font_size,
-        is_rtl=DEFAULT_IS_RTL,
-    )
-    draw_text_no_box(
-        draw,
-        georgian(year=True, month=True, day=True, days_into_future=days_into_future),
-        fonts["english_date"],
-        *positions["english_date"],
-        alignment="center",
-        font_size=date_font_size,
-    )
-    draw_text_no_box(
-        draw,
-        day_of_week(days_into_future=days_into_future),
-        fonts["weekday"],
-        *positions["weekday"],
-        alignment="center",
-        font_size=date_font_size,
-        is_rtl=DEFAULT_IS_RTL,
+    Returns:
+        The encoded image bytes when output_path is None, otherwise None.
+    """
+    params = dict(
+        user_image_path=user_image_path,
+        overline_text=overline_text,
+        main_headline_text=main_headline_text,
+        event1_text=event1_text,
+        event2_text=event2_text,
+        event3_text=event3_text,
+        days_into_future=days_into_future,
+        dynamic_font_size=dynamic_font_size,
+        overline_font_size_delta=overline_font_size_delta,
+        main_headline_font_size_delta=main_headline_font_size_delta,
+        watermark=watermark,
+        composed=composed,
+        scale=scale,
+        photo_fit=photo_fit,
+        context=context,
     )
+    with profile_render(TEMPLATE_NAME, emit=profile):
+        if cache is not None:
+            cached = render_cached(
+                cache,
+                TEMPLATE_NAME,
+                build_newspaper_image,
+                params,
+                date_labels,
+                load_plan(TEMPLATE_NAME).assets,
+                output_path,
+                encoder,
+            )
+            print("python code log: created news paper image." + (" (cached)" if cached.hit else ""))
+            return cached.data if output_path is None else None
 
-    # Optionally add watermark.
-    if watermark:
-        watermark_path = "./assets/images/watermark_no_back_ground.png"
-        watermark_position = (200, 3100)
-        base_img = apply_watermark(
-            base_img,
-            watermark_path,
-            position=watermark_position,  # 2-tuple position; scale factor applies
-            scale=2.6,  # adjust scale as needed
-            opacity=0.8,  # 80% opacity
-            adaptive_color=True,  # adjust color based on underlying region
-        )
+        base_img = build_newspaper_image(**params)
 
-    # Save the final image.
-    print("python code log: created news paper image.")
-    base_img.convert("RGB").save(output_path, format="JPEG", quality=95)
+        # Save the final image.
+        print("python code log: created news paper image.")
+        encoded = save_encoded(base_img, output_path, encoder)
+        return encoded.data if output_path is None else None
 
 
 # if __name__ == "__main__":
@@ -276,6 +251,23 @@ if __name__ == "__main__":
         "--event3_text", type=str, default=None, help="Optional text for event 3."
     )
 
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Render scale, e.g. 0.5 or 0.25 for a fast draft preview.",
+    )
+    parser.add_argument(
+        "--photo_fit",
+        type=str,
+        default="stretch",
+        choices=PHOTO_FITS,
+        help="How the user image fills its slot.",
+    )
+    add_context_arguments(parser)
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    add_encoder_arguments(parser)
     args = parser.parse_args()
 
     create_newspaper_image(
@@ -289,6 +281,12 @@ if __name__ == "__main__":
         dynamic_font_size=args.dynamic_font_size,
         watermark=args.watermark,
         composed=args.composed,
+        encoder=encoder_from_args(args),
+        scale=args.scale,
+        photo_fit=args.photo_fit,
+        context=context_from_args(args),
+        cache=cache_from_args(args),
+        profile=args.profile,
         event1_text=args.event1_text,
         event2_text=args.event2_text,
         event3_text=args.event3_text,
@@ -0,0 +1,351 @@
+# render_cache.py
+#
+# Content-addressed cache of encoded renders on local disk. A render's key is a
+# sha256 over everything that can change its bytes: the input photo, every
+# template argument, the date texts actually drawn, the template's asset files,
+# the encoder settings and the rendering code itself. Identical requests then
+# return the stored image without rendering.
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import PIL
+from PIL import Image, features
+
+from image_encoder import (
+    DEFAULT_ENCODER,
+    PREVIEW_SUFFIX,
+    EncodeReport,
+    EncoderSettings,
+    save_encoded,
+    write_output,
+)
+from img_util import ImageSource, OutputTarget
+from render_context import resolve_context
+from render_profile import count, stage
+
+# Default configuration constants
+DEFAULT_CACHE_DIR: str = "./.render_cache"
+DEFAULT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+# Modules whose source takes part in every render. Editing any of them
+# invalidates all cached renders.
+RENDER_MODULES = (
+    "cache_util",
+    "date_util",
+    "font_cache",
+    "image_encoder",
+    "img_util",
+    "render_context",
+    "template_engine",
+    "text_utils",
+)
+
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+_code_versions: Dict[Tuple[str, ...], str] = {}
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns the sha256 of a file's contents, or 'missing'. Digests are
+    memoized by path, size and mtime, so unchanged assets are hashed once.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _file_digests[key] = sha.hexdigest()
+    return digest
+
+
+def code_version(*modules: str) -> str:
+    """
+    Returns a digest of the rendering code: the source of RENDER_MODULES and the
+    given template modules, plus the Pillow version and whether RAQM is used.
+    """
+    names = tuple(sorted(set(RENDER_MODULES + modules)))
+    version = _code_versions.get(names)
+    if version is None:
+        digest = hashlib.sha256(f"{PIL.__version__} raqm={features.check('raqm')}".encode())
+        for name in names:
+            module = sys.modules.get(name) or __import__(name)
+            digest.update(name.encode())
+            digest.update(file_digest(inspect.getfile(module)).encode())
+        version = _code_versions[names] = digest.hexdigest()
+    return version
+
+
+def read_source(source: ImageSource) -> bytes:
+    """Reads an image source (path, bytes or binary file-like object) into bytes."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    return source.read()
+
+
+class RenderCache:
+    """
+    Encoded renders stored as files named by their key, evicted least recently
+    used first once the directory grows past max_bytes. A render's preview, if
+    any, is stored next to it and evicted with it. Reads refresh a file's mtime,
+    which is what eviction orders by. Writes are atomic, so several processes
+    can share one directory.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive.")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # bytes on disk; scanned on first write
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entries(self) -> Iterable[os.DirEntry]:
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.is_file())
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _write(self, key: str, data: bytes) -> int:
+        """Writes data under key and returns the change in bytes on disk."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        return len(data) - replaced
+
+    def get_entry(self, key: str, with_preview: bool = False) -> Optional[Tuple[bytes, Optional[bytes]]]:
+        """
+        Returns the (data, preview) stored for key, or None, counting one hit or miss.
+
+        The preview is only read when with_preview is set; an entry stored
+        without a preview then counts as a miss.
+        """
+        data = self._read(key)
+        preview = self._read(key + PREVIEW_SUFFIX) if data is not None and with_preview else None
+        hit = data is not None and (preview is not None or not with_preview)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return (data, preview) if hit else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the stored bytes for key, or None."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, data: bytes, preview: Optional[bytes] = None) -> None:
+        """Stores data (and its preview) under key, then evicts old entries if over budget."""
+        # The preview goes first, so a reader never finds new data without it.
+        added = self._write(key + PREVIEW_SUFFIX, preview) if preview is not None else 0
+        added += self._write(key, data)
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._total += added
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # A render and its preview are one entry: ordered by the newer of the
+        # two files and removed together.
+        groups: Dict[str, List[Any]] = {}
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            key = entry.path[: -len(PREVIEW_SUFFIX)] if entry.path.endswith(PREVIEW_SUFFIX) else entry.path
+            group = groups.setdefault(key, [0, 0, []])
+            group[0] = max(group[0], stat.st_mtime_ns)
+            group[1] += stat.st_size
+            group[2].append(entry.path)
+        total = sum(size for _, size, _ in groups.values())
+        for _, size, paths in sorted(groups.values()):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+        self._total = total
+
+    def info(self) -> Dict[str, int]:
+        """Returns hit/miss counts of this instance and the entries and bytes on disk."""
+        sizes = [entry.stat().st_size for entry in self._entries()]
+        return {"hits": self.hits, "misses": self.misses, "entries": len(sizes), "bytes": sum(sizes)}
+
+    def clear(self) -> None:
+        """Deletes every stored render and resets the statistics."""
+        with self._lock:
+            for entry in list(self._entries()):
+                os.remove(entry.path)
+            self.hits = self.misses = 0
+            self._total = 0
+
+
+def render_key(
+    template: str,
+    build: Callable[..., Image.Image],
+    params: Dict[str, Any],
+    date_labels: Callable[..., Dict[str, str]],
+    asset_paths: Iterable[str],
+    encoder: Optional[EncoderSettings] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Computes the cache key of a render.
+
+    Args:
+        template: Template name, e.g. 'newspaper'.
+        build: The template's build function; params are bound to its signature
+               so defaults take part in the key.
+        params: Keyword arguments for build, including 'user_image_path'.
+        date_labels: The template's date_labels(context, days_into_future) function.
+                     The key holds the date texts it returns rather than the
+                     timestamp, so renders stay cached for as long as they look the same.
+        asset_paths: Template PNGs and fonts the render may read.
+        encoder: Output encoder settings.
+
+    Returns:
+        tuple: (hex key, params with the photo read into bytes and the context resolved).
+               Render from these params, so the render matches the key.
+    """
+    signature = inspect.signature(build)
+    bound = signature.bind(**params)
+    bound.apply_defaults()
+    args = dict(bound.arguments)
+    for name, parameter in signature.parameters.items():
+        if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+            args.update(args.pop(name, {}))
+
+    photo = read_source(args["user_image_path"])
+    context = resolve_context(args.get("context"))
+    render_params = dict(params, user_image_path=photo, context=context)
+
+    inputs = {k: v for k, v in args.items() if k not in ("user_image_path", "context")}
+    material = {
+        "template": template,
+        "code": code_version(build.__module__),
+        "photo": hashlib.sha256(photo).hexdigest(),
+        "params": inputs,
+        "dates": date_labels(context, args.get("days_into_future", 0)),
+        "assets": {path: file_digest(path) for path in sorted(set(asset_paths))},
+        "encoder": asdict(encoder or DEFAULT_ENCODER),
+    }
+    canonical = json.dumps(material, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), render_params
+
+
+@dataclass
+class CachedRender:
+    """Result of render_cached: the encoded bytes, the preview, and whether it was a cache hit."""
+
+    data: bytes
+    preview: Optional[bytes]
+    hit: bool
+    key: str
+    report: Optional[EncodeReport] = None  # only set when the image was rendered
+
+
+def render_cached(
+    cache: RenderCache,
+    template: str,
+    build: Callable[..., Image.Image],
+    params: Dict[str, Any],
+    date_labels: Callable[..., Dict[str, str]],
+    asset_paths: Iterable[str],
+    output: Optional[OutputTarget] = None,
+    encoder: Optional[EncoderSettings] = None,
+) -> CachedRender:
+    """
+    Returns a stored render when the same inputs were rendered before, and
+    otherwise renders, encodes and stores it. The result is written to output
+    (with its preview, if the encoder asks for one) either way.
+
+    See render_key for the arguments.
+    """
+    with stage("cache.key"):
+        key, render_params = render_key(template, build, params, date_labels, asset_paths, encoder)
+    wants_preview = (encoder or DEFAULT_ENCODER).preview_max_side is not None
+
+    # The preview is part of the stored render: a render without one is a miss.
+    entry = cache.get_entry(key, with_preview=wants_preview)
+    if entry is not None:
+        data, preview = entry
+        count("cache_hits")
+        if output is not None:
+            write_output(data, output, preview)
+        return CachedRender(data=data, preview=preview, hit=True, key=key)
+
+    count("cache_misses")
+    encoded = save_encoded(build(**render_params), output, encoder)
+    cache.put(key, encoded.data, encoded.preview)
+    return CachedRender(
+        data=encoded.data, preview=encoded.preview, hit=False, key=key, report=encoded.report
+    )
+
+
+def add_cache_arguments(parser) -> None:
+    """Adds the render cache options shared by the template CLIs to an argparse parser."""
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help=f"Reuse identical renders from this directory (e.g. {DEFAULT_CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--cache_max_mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Size limit of the render cache in MiB; least recently used renders are evicted.",
+    )
+
+
+def cache_from_args(args) -> Optional[RenderCache]:
+    """Builds a RenderCache from arguments added by add_cache_arguments, or None if disabled."""
+    if not args.cache_dir:
+        return None
+    return RenderCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
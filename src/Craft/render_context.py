@@ -0,0 +1,114 @@
+# render_context.py
+
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, Optional, Union
+from zoneinfo import ZoneInfo
+
+# Default configuration constants
+DEFAULT_TIMEZONE: Optional[str] = None  # None uses the system's local timezone
+
+
+def _zone(name: Optional[str]):
+    if name is None:
+        return None
+    if name.upper() == "UTC":
+        return dt_timezone.utc
+    return ZoneInfo(name)
+
+
+@dataclass(frozen=True)
+class RenderContext:
+    """
+    The single moment a render is drawn at.
+
+    Templates read every date and clock label from this timestamp instead of
+    calling datetime.now(), so rendering the same inputs with the same context
+    always produces the same bytes.
+
+    Attributes:
+        timestamp: Timezone-aware render time. A naive datetime is taken as local time.
+    """
+
+    timestamp: datetime
+
+    def __post_init__(self):
+        if self.timestamp.tzinfo is None:
+            object.__setattr__(self, "timestamp", self.timestamp.astimezone())
+
+    @classmethod
+    def now(cls, timezone: Optional[str] = DEFAULT_TIMEZONE) -> "RenderContext":
+        """Freezes the current time, in the given IANA timezone or the local one."""
+        zone = _zone(timezone)
+        return cls(datetime.now(zone) if zone else datetime.now().astimezone())
+
+    @classmethod
+    def at(
+        cls, timestamp: Union[datetime, str, float, int], timezone: Optional[str] = None
+    ) -> "RenderContext":
+        """
+        Builds a context for a fixed time.
+
+        Args:
+            timestamp: A datetime, an ISO 8601 string, or Unix seconds.
+            timezone: Optional IANA name (e.g. 'Asia/Tehran') to convert the
+                      timestamp to; dates and clock labels are read in this zone.
+        """
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        elif isinstance(timestamp, (int, float)):
+            timestamp = datetime.fromtimestamp(timestamp, dt_timezone.utc)
+        context = cls(timestamp)
+        zone = _zone(timezone)
+        if zone is not None:
+            context = cls(context.timestamp.astimezone(zone))
+        return context
+
+    @classmethod
+    def from_dict(cls, options: Dict[str, Any]) -> "RenderContext":
+        """Builds a context from {'timestamp': ..., 'timezone': ...}; a missing timestamp means now."""
+        timestamp = options.get("timestamp")
+        if timestamp is None:
+            return cls.now(options.get("timezone"))
+        return cls.at(timestamp, options.get("timezone"))
+
+    def as_dict(self) -> Dict[str, str]:
+        """
+        Returns {'timestamp': ..., 'timezone': ...}, which from_dict turns back
+        into this context. 'timezone' is only given for UTC and IANA zones; a
+        fixed offset (e.g. from an ISO string or the local zone) is already
+        carried by the ISO timestamp.
+        """
+        options = {"timestamp": self.timestamp.isoformat()}
+        tzinfo = self.timestamp.tzinfo
+        if isinstance(tzinfo, ZoneInfo):
+            options["timezone"] = tzinfo.key
+        elif tzinfo is dt_timezone.utc:
+            options["timezone"] = "UTC"
+        return options
+
+
+def resolve_context(context: Optional[RenderContext]) -> RenderContext:
+    """Returns context, or a context frozen at the current time if it is None."""
+    return context if context is not None else RenderContext.now()
+
+
+def add_context_arguments(parser) -> None:
+    """Adds the render-time options shared by the template CLIs to an argparse parser."""
+    parser.add_argument(
+        "--timestamp",
+        type=str,
+        default=None,
+        help="Render as of this ISO 8601 time instead of now (reproducible output).",
+    )
+    parser.add_argument(
+        "--timezone",
+        type=str,
+        default=DEFAULT_TIMEZONE,
+        help="IANA timezone for date and clock labels, e.g. 'Asia/Tehran'. Default: local.",
+    )
+
+
+def context_from_args(args) -> RenderContext:
+    """Builds a RenderContext from arguments added by add_context_arguments."""
+    return RenderContext.from_dict({"timestamp": args.timestamp, "timezone": args.timezone})
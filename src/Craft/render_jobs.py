@@ -0,0 +1,167 @@
+# render_jobs.py
+
+import base64
+import contextlib
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+from PIL import Image
+
+import breaking_news_template
+import newspaper_template
+from date_util import precompute_date_table
+from font_cache import preload_fonts
+from image_encoder import EncoderSettings, save_encoded
+from img_util import load_template_image
+from render_cache import DEFAULT_CACHE_MAX_BYTES, RenderCache, render_cached
+from render_context import RenderContext
+from render_profile import profiling
+from template_engine import available_templates, load_plan
+from text_utils import prewarm_shaping_cache
+
+# Template name -> in-memory render function. Job parameters are passed through as
+# keyword arguments, so they use the same names as the create_* template functions;
+# output_path and encoder are handled here so the encode can be measured. Any other
+# template spec in template_engine's spec directory is rendered from its plan.
+TEMPLATES: Dict[str, Callable[..., Image.Image]] = {
+    "newspaper": newspaper_template.build_newspaper_image,
+    "breaking_news": breaking_news_template.build_breaking_news_image,
+}
+
+RETURN_MODES = ("path", "bytes")
+
+# Render cache consulted by run_job; None renders every job.
+_render_cache: Optional[RenderCache] = None
+
+
+def set_render_cache(cache: Optional[RenderCache]) -> None:
+    """Sets the render cache run_job uses in this process, or disables it with None."""
+    global _render_cache
+    _render_cache = cache
+
+
+def warm_up() -> None:
+    """
+    Loads the assets every render needs, so the first job in a long-lived
+    process costs the same as the rest. Missing files are left for the render
+    itself to report.
+    """
+    plans = [load_plan(name) for name in available_templates()]
+    font_paths = {path for plan in plans for path in plan.fonts.values()}
+    preload_fonts(path for path in sorted(font_paths) if os.path.isfile(path))
+    prewarm_shaping_cache()
+    precompute_date_table()
+
+    template_paths = {path for plan in plans for path in plan.image_paths}
+    for path in sorted(template_paths):
+        if os.path.isfile(path):
+            load_template_image(path)
+
+
+def init_worker(cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+    """
+    Prepares a render process: sets its render cache (None disables it) and
+    warms it up. Used as the initializer of worker pools.
+    """
+    set_render_cache(RenderCache(cache_dir, cache_max_bytes) if cache_dir else None)
+    warm_up()
+
+
+def run_job(job: Dict[str, Any], redirect_stdout: bool = True) -> Dict[str, Any]:
+    """
+    Renders a single job description and returns a JSON-serialisable result.
+
+    Args:
+        job (dict): Job description with keys:
+            - template (str): One of TEMPLATES ('newspaper', 'breaking_news'), or
+              the name of any other spec in template_engine.DEFAULT_SPEC_DIR.
+            - params (dict): Keyword arguments for the template function. 'encoder'
+              may be a dict of image_encoder.EncoderSettings fields, and 'context'
+              a dict with 'timestamp' (ISO 8601) and/or 'timezone' (IANA name).
+            - return (str): 'path' (default) to write to params['output_path'],
+              or 'bytes' to get the encoded image back as base64.
+            - user_image_base64 (str): Optional input photo sent inline; it
+              replaces params['user_image_path'].
+            - profile (bool): If True, the result carries a 'profile' with
+              per-stage timings and call counts (see render_profile).
+            - id (any): Optional identifier echoed back in the result.
+        redirect_stdout (bool): Send anything printed during the render to stderr.
+            This swaps the process-wide sys.stdout, so callers rendering on
+            several threads at once must pass False.
+
+    Returns:
+        dict: {'id', 'ok', 'elapsed_ms'} plus, on success, 'output_path' or
+              'image_base64' (and 'preview_base64' when a preview was requested)
+              'encode' with the encoder report and 'context' with the render time
+              used (send it back to reproduce the image); or 'error' on failure.
+              With a render cache set (see set_render_cache), 'cache' is 'hit' or
+              'miss', and hits carry no 'encode' report. Errors never propagate.
+    """
+    result: Dict[str, Any] = {"id": job.get("id")}
+    start = time.perf_counter()
+    try:
+        template = job.get("template")
+        # Built-in templates skip listing the spec directory on every job.
+        if template not in TEMPLATES:
+            spec_templates = available_templates()
+            if template not in spec_templates:
+                raise ValueError(
+                    f"Unknown template {template!r}; "
+                    f"expected one of {sorted(set(TEMPLATES) | set(spec_templates))}."
+                )
+        return_mode = job.get("return", "path")
+        if return_mode not in RETURN_MODES:
+            raise ValueError("return must be 'path' or 'bytes'.")
+
+        params = dict(job.get("params") or {})
+        if "user_image_base64" in job:
+            params["user_image_path"] = base64.b64decode(job["user_image_base64"])
+        output_path = params.pop("output_path", None)
+        if return_mode == "path" and not output_path:
+            raise ValueError("params.output_path is required in 'path' mode.")
+        encoder = params.pop("encoder", None)
+        if isinstance(encoder, dict):
+            encoder = EncoderSettings(**encoder)
+        # Freeze the render time here, so the result can report it.
+        context = params.get("context")
+        if not isinstance(context, RenderContext):
+            context = RenderContext.from_dict(context or {})
+        params["context"] = context
+        # The plan, reloaded if its spec changed, also gives the render cache its
+        # date labels and assets, so cache keys follow the layout actually drawn.
+        plan = load_plan(template)
+        render = TEMPLATES.get(template, plan.render)
+        labels, assets = plan.date_labels, plan.assets
+        output = output_path if return_mode == "path" else None
+
+        # Template functions log to stdout; keep it clean for protocol output.
+        with contextlib.ExitStack() as stack:
+            if redirect_stdout:
+                stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+            profile = stack.enter_context(profiling(template)) if job.get("profile") else None
+            if _render_cache is not None:
+                encoded = render_cached(
+                    _render_cache, template, render, params, labels, assets, output, encoder
+                )
+                result["cache"] = "hit" if encoded.hit else "miss"
+            else:
+                encoded = save_encoded(render(**params), output, encoder)
+        if profile is not None:
+            result["profile"] = profile.as_dict()
+        if return_mode == "path":
+            result["output_path"] = output_path
+        else:
+            result["image_base64"] = base64.b64encode(encoded.data).decode("ascii")
+            if encoded.preview is not None:
+                result["preview_base64"] = base64.b64encode(encoded.preview).decode("ascii")
+        if encoded.report is not None:
+            result["encode"] = encoded.report.as_dict()
+        result["context"] = context.as_dict()
+        result["ok"] = True
+    except Exception as exc:  # report, never abort the caller's loop
+        result["ok"] = False
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
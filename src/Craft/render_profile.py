@@ -0,0 +1,188 @@
+# render_profile.py
+#
+# Opt-in instrumentation of template renders. While a profile is active, the
+# render pipeline records nanosecond timings of its stages (photo decode,
+# resize, template composite, headline layout, date labels, watermark, encode)
+# and counts of expensive calls (fonts loaded, textbbox calls, shaping calls)
+# into one report per render.
+#
+# Nothing is recorded unless a profile is active, so a disabled hook costs one
+# ContextVar lookup:
+#
+#   with profiling("newspaper") as profile:
+#       create_newspaper_image(...)
+#   print(profile.as_dict())
+#
+# or set CRAFT_PROFILE=1 (or pass profile=True / --profile) to have every
+# create_* call write its report as JSON to stderr.
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, TypeVar
+
+# Environment variable that turns on profiling of every create_* render.
+PROFILE_ENV_VAR: str = "CRAFT_PROFILE"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RenderProfile:
+    """
+    Stage timings and counters of one render.
+
+    Stages may nest (e.g. 'headline' contains 'text.layout'); each stage's time
+    is inclusive, so stage times can add up to more than the total.
+    """
+
+    def __init__(self, name: str = "render"):
+        self.name = name
+        self.stages: Dict[str, int] = {}  # name -> total nanoseconds
+        self.calls: Dict[str, int] = {}  # name -> times the stage ran
+        self.counters: Dict[str, int] = {}
+        self.total_ns: Optional[int] = None
+        self._start_ns = time.perf_counter_ns()
+
+    def add_stage(self, name: str, elapsed_ns: int) -> None:
+        self.stages[name] = self.stages.get(name, 0) + elapsed_ns
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self) -> None:
+        self.total_ns = time.perf_counter_ns() - self._start_ns
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the report as a JSON-serialisable dict."""
+        total_ns = self.total_ns if self.total_ns is not None else time.perf_counter_ns() - self._start_ns
+        return {
+            "name": self.name,
+            "total_ns": total_ns,
+            "stages": {
+                name: {"ns": elapsed, "calls": self.calls[name]}
+                for name, elapsed in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+_active: ContextVar[Optional[RenderProfile]] = ContextVar("render_profile", default=None)
+
+
+class _Stage:
+    __slots__ = ("_profile", "_name", "_start")
+
+    def __init__(self, profile: RenderProfile, name: str):
+        self._profile = profile
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info) -> None:
+        self._profile.add_stage(self._name, time.perf_counter_ns() - self._start)
+
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def active_profile() -> Optional[RenderProfile]:
+    """Returns the profile of the render in progress, or None when profiling is off."""
+    return _active.get()
+
+
+def stage(name: str):
+    """
+    Returns a context manager that times its block as stage 'name' of the
+    active profile; a shared no-op context when profiling is off.
+    """
+    profile = _active.get()
+    if profile is None:
+        return _NO_STAGE
+    return _Stage(profile, name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of stage(): times every call of the function as stage 'name'."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _active.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.add_stage(name, time.perf_counter_ns() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Adds amount to counter 'name' of the active profile, if any."""
+    profile = _active.get()
+    if profile is not None:
+        profile.count(name, amount)
+
+
+@contextlib.contextmanager
+def profiling(name: str = "render") -> Iterator[RenderProfile]:
+    """
+    Activates a new profile for the block and yields it. The profile is
+    finished (total_ns set) when the block exits.
+    """
+    profile = RenderProfile(name)
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        profile.finish()
+
+
+def profiling_requested() -> bool:
+    """Returns True if CRAFT_PROFILE is set to a non-empty value other than '0'."""
+    return os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+
+def write_report(profile: RenderProfile, stream: Optional[TextIO] = None) -> None:
+    """Writes the report as one line of JSON to stream (default stderr)."""
+    stream = stream if stream is not None else sys.stderr
+    print(json.dumps(profile.as_dict()), file=stream)
+
+
+@contextlib.contextmanager
+def profile_render(name: str, emit: bool = False) -> Iterator[Optional[RenderProfile]]:
+    """
+    Wraps one create_* render.
+
+    Inside a caller's profiling() block the render is recorded into that
+    profile. Otherwise, if emit is True or CRAFT_PROFILE is set, the render is
+    profiled on its own and its report written to stderr. Yields the profile in
+    use, or None when profiling is off.
+    """
+    profile = _active.get()
+    if profile is not None or not (emit or profiling_requested()):
+        yield profile
+        return
+    with profiling(name) as profile:
+        yield profile
+    write_report(profile)
+
+
+def add_profile_arguments(parser) -> None:
+    """Adds the --profile option shared by the template CLIs to an argparse parser."""
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write per-stage render timings as JSON to stderr.",
+    )
@@ -0,0 +1,142 @@
+# render_server.py
+#
+# Long-lived render process. Keeps the interpreter, Pillow, the shaping and date
+# libraries, the template fonts and the decoded template PNGs loaded between
+# requests, so a render no longer pays for process start-up, imports or asset loads.
+#
+# Protocol: one JSON object per line in, one JSON object per line out.
+#   Request:  {"id": 1, "template": "newspaper", "params": {...}, "return": "path"}
+#   Response: {"id": 1, "ok": true, "output_path": "...", "elapsed_ms": 412.3}
+#             Add "return": "bytes" to get "image_base64" back instead of a file,
+#             and "user_image_base64" to send the photo inline.
+#   Control:  {"command": "ping"} -> {"ok": true, "pong": true}
+#             {"command": "shutdown"} -> {"ok": true} and the server exits.
+#   With --cache_dir, repeated requests are answered from a render cache and
+#   responses carry "cache": "hit" or "miss".
+#
+# Run from the repository root (template asset paths are relative):
+#   python src/Craft/render_server.py                      # stdin/stdout
+#   python src/Craft/render_server.py --socket /tmp/craft.sock
+
+import argparse
+import io
+import json
+import os
+import socketserver
+import sys
+from typing import Any, Dict, Optional, TextIO
+
+from render_cache import add_cache_arguments, cache_from_args
+from render_jobs import run_job, set_render_cache, warm_up
+
+
+def parse_request(line: str) -> Dict[str, Any]:
+    """
+    Decodes one protocol line.
+
+    Raises:
+        ValueError: If the line is not a JSON object.
+    """
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    return request
+
+
+def invalid_request(exc: Exception) -> Dict[str, Any]:
+    """Returns the response to a line parse_request rejected."""
+    return {"id": None, "ok": False, "error": f"Invalid request: {exc}"}
+
+
+def handle_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses and executes one protocol line.
+
+    Args:
+        line (str): A single JSON-encoded request.
+
+    Returns:
+        dict or None: The response object, or None for a shutdown request.
+    """
+    try:
+        request = parse_request(line)
+    except ValueError as exc:
+        return invalid_request(exc)
+
+    command = request.get("command")
+    if command == "shutdown":
+        return None
+    if command == "ping":
+        return {"id": request.get("id"), "ok": True, "pong": True}
+    if command is not None:
+        return {"id": request.get("id"), "ok": False, "error": f"Unknown command {command!r}."}
+    return run_job(request)
+
+
+def serve_stream(reader: TextIO, writer: TextIO) -> bool:
+    """
+    Serves JSON-lines requests from reader until EOF or shutdown.
+
+    Returns:
+        bool: True if a shutdown command was received.
+    """
+    for line in reader:
+        if not line.strip():
+            continue
+        response = handle_line(line)
+        if response is None:
+            writer.write(json.dumps({"ok": True}) + "\n")
+            writer.flush()
+            return True
+        writer.write(json.dumps(response, ensure_ascii=False) + "\n")
+        writer.flush()
+    return False
+
+
+class _RenderRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        reader = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        writer = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        if serve_stream(reader, writer):
+            # shutdown() would deadlock from inside a handler; flag the loop instead.
+            self.server._shutdown_requested = True
+        writer.detach()
+        reader.detach()
+
+
+def serve_socket(socket_path: str) -> None:
+    """
+    Serves the JSON-lines protocol on a Unix domain socket. Connections are
+    handled one at a time, so renders never run concurrently in this process.
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with socketserver.UnixStreamServer(socket_path, _RenderRequestHandler) as server:
+        server._shutdown_requested = False
+        print(f"python code log: render server listening on {socket_path}", file=sys.stderr)
+        try:
+            while not server._shutdown_requested:
+                server.handle_request()
+        finally:
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Persistent render server speaking a JSON-lines protocol."
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Unix socket path to listen on. Defaults to stdin/stdout.",
+    )
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    set_render_cache(cache_from_args(args))
+    warm_up()
+    if args.socket:
+        serve_socket(args.socket)
+    else:
+        serve_stream(sys.stdin, sys.stdout)
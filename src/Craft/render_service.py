@@ -0,0 +1,377 @@
+# render_service.py
+#
+# Asyncio front end for the renderers. Renders run in a thread or process
+# pool, at most max_concurrency at a time; up to max_queue more wait for a
+# free worker, and anything beyond that is turned away at once with a "busy"
+# response instead of piling up behind a burst of users. The variants of one
+# request (e.g. a large and a small newspaper card) render concurrently and are
+# streamed back as each one finishes.
+#
+# Protocol: render_server's JSON lines, except that the requests of one
+# connection are served concurrently, so responses can arrive out of order;
+# match them by "id".
+#   Variants: {"id": 7, "variants": [{job}, {job}, ...]}
+#             -> {"id": 7, "variant": 1, "ok": true, ...} for each variant as it finishes,
+#                then {"id": 7, "ok": true, "done": true, "variants": 2, "failed": 0}.
+#   Busy:     {"id": 7, "ok": false, "busy": true, "error": "..."} when the queue is
+#             full. A variants request is admitted or turned away as a whole.
+#   Control:  {"command": "stats"} -> {"ok": true, "stats": {...}}; ping and
+#             shutdown as in render_server (shutdown waits for in-flight renders).
+#
+# Run from the repository root (template asset paths are relative):
+#   python src/Craft/render_service.py --socket /tmp/craft.sock --workers 4 --max_queue 32
+#   python src/Craft/render_service.py --executor process   # stdin/stdout
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from render_cache import DEFAULT_CACHE_MAX_BYTES, add_cache_arguments
+from render_jobs import init_worker, run_job
+from render_server import invalid_request, parse_request
+
+# Default configuration constants
+DEFAULT_MAX_CONCURRENCY: int = min(4, os.cpu_count() or 1)
+DEFAULT_MAX_QUEUE: int = 16
+DEFAULT_MAX_LINE_BYTES: int = 64 * 1024 * 1024  # requests may carry a base64 photo
+
+# 'thread' shares one warm process and keeps the event loop free while Pillow
+# works; 'process' renders on every core at the cost of a warm-up per worker.
+EXECUTORS = ("thread", "process")
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class RenderService:
+    """
+    Runs render jobs (see render_jobs.run_job) off the event loop with bounded
+    concurrency and a bounded queue.
+
+    Use it as a context manager, or call close() when done:
+
+        with RenderService(max_concurrency=2, max_queue=8) as service:
+            result = await service.render(job)
+            async for index, result in service.render_variants([job_a, job_b]):
+                ...
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        executor: str = "thread",
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ):
+        """
+        Args:
+            max_concurrency (int): Renders running at the same time (pool size).
+            max_queue (int): Admitted jobs that may wait for a free worker. Jobs
+                             beyond max_concurrency + max_queue are rejected.
+            executor (str): 'thread' or 'process'.
+            cache_dir (str): Optional render cache directory (see render_cache).
+            cache_max_bytes (int): Size limit of the render cache.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative.")
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}.")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.pending = 0  # admitted jobs not yet finished, running or queued
+        self.completed = 0
+        self.rejected = 0
+
+        # run_job's stdout redirect swaps sys.stdout for the whole process, so it
+        # is only safe in single-threaded worker processes. In thread mode,
+        # stdout is left to the embedding program (serve_stdio redirects it once).
+        self._redirect_stdout = executor == "process"
+        self._executor_kind = executor
+        self._worker_args = (cache_dir, cache_max_bytes)
+        if executor == "thread":
+            init_worker(cache_dir, cache_max_bytes)
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> Executor:
+        if self._executor_kind == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.max_concurrency, initializer=init_worker, initargs=self._worker_args
+            )
+        return ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="render")
+
+    def _replace_broken_pool(self, broken: Executor) -> None:
+        # A worker process died: the pool refuses new work from now on, so start
+        # a fresh one (once, however many jobs saw the breakage).
+        if self._executor is broken:
+            print("python code log: render worker died; starting a new process pool", file=sys.stderr)
+            broken.shutdown(wait=False)
+            self._executor = self._new_executor()
+
+    def _admit(self, jobs: int) -> None:
+        if self.pending + jobs > self.max_concurrency + self.max_queue:
+            self.rejected += jobs
+            raise asyncio.QueueFull(
+                f"Render queue is full ({self.pending} pending, limit "
+                f"{self.max_concurrency} running + {self.max_queue} queued)."
+            )
+        self.pending += jobs
+
+    def _release(self) -> None:
+        self.pending -= 1
+        self.completed += 1
+
+    async def _run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = executor.submit(run_job, job, self._redirect_stdout)
+        except RuntimeError as exc:  # BrokenProcessPool, or submit after close()
+            self._release()
+            if isinstance(exc, BrokenProcessPool):
+                self._replace_broken_pool(executor)
+            return _failed(job, exc)
+
+        def release(done: Future) -> None:
+            # Runs in a worker thread once the job leaves the pool, even if the
+            # caller stopped waiting for it; the counters live on the loop.
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._release)
+
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as exc:  # e.g. a crashed worker process; report like run_job
+            if isinstance(exc, BrokenProcessPool):
+                self._replace_broken_pool(executor)
+            return _failed(job, exc)
+
+    async def render(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Renders one job and returns run_job's result.
+
+        Raises:
+            asyncio.QueueFull: Immediately, if max_concurrency + max_queue jobs are pending.
+        """
+        self._admit(1)
+        return await self._run(job)
+
+    def render_variants(self, jobs: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Starts every job at once and returns an async iterator of (index, result)
+        pairs in the order the renders finish. Must be called from a running
+        event loop.
+
+        Raises:
+            asyncio.QueueFull: Immediately, if the jobs do not all fit in the queue;
+                               none of them is started then.
+        """
+        self._admit(len(jobs))
+        tasks = [asyncio.ensure_future(self._run(job)) for job in jobs]
+        return _as_completed(tasks)
+
+    def info(self) -> Dict[str, int]:
+        """Returns the limits and the pending, completed and rejected job counts."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def close(self) -> None:
+        """Waits for running renders and shuts the worker pool down."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "RenderService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def _as_completed(tasks: List["asyncio.Future[Dict[str, Any]]"]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    index = {task: i for i, task in enumerate(tasks)}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=index.__getitem__):
+                yield index[task], task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _failed(job: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+    return {"id": job.get("id"), "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _busy(request_id: Any, exc: asyncio.QueueFull) -> Dict[str, Any]:
+    return {"id": request_id, "ok": False, "busy": True, "error": str(exc)}
+
+
+async def handle_request(service: RenderService, request: Dict[str, Any], send: Send) -> None:
+    """
+    Executes one parsed request (other than shutdown) and sends its response
+    lines: one for a job or command, one per variant plus a final 'done' line
+    for a variants request.
+    """
+    request_id = request.get("id")
+    command = request.get("command")
+    if command == "ping":
+        await send({"id": request_id, "ok": True, "pong": True})
+        return
+    if command == "stats":
+        await send({"id": request_id, "ok": True, "stats": service.info()})
+        return
+    if command is not None:
+        await send({"id": request_id, "ok": False, "error": f"Unknown command {command!r}."})
+        return
+
+    if "variants" not in request:
+        try:
+            result = await service.render(request)
+        except asyncio.QueueFull as exc:
+            result = _busy(request_id, exc)
+        await send(result)
+        return
+
+    variants = request["variants"]
+    if not isinstance(variants, list) or not all(isinstance(job, dict) for job in variants):
+        await send({"id": request_id, "ok": False, "error": "variants must be a list of job objects."})
+        return
+    try:
+        results = service.render_variants(variants)
+    except asyncio.QueueFull as exc:
+        await send(_busy(request_id, exc))
+        return
+    failed = 0
+    async for index, result in results:
+        failed += not result["ok"]
+        await send(dict(result, id=request_id, variant=index))
+    await send({"id": request_id, "ok": failed == 0, "done": True, "variants": len(variants), "failed": failed})
+
+
+async def serve_connection(service: RenderService, reader: asyncio.StreamReader, writer: Any) -> bool:
+    """
+    Serves JSON-lines requests from reader until EOF or shutdown, running them
+    concurrently and writing each response line as soon as it is ready.
+
+    Returns:
+        bool: True if a shutdown command was received.
+    """
+    write_lock = asyncio.Lock()
+    in_flight: "set[asyncio.Future[None]]" = set()
+
+    async def send(response: Dict[str, Any]) -> None:
+        async with write_lock:
+            writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    shutdown = False
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = parse_request(line.decode("utf-8"))
+        except ValueError as exc:  # includes UnicodeDecodeError
+            await send(invalid_request(exc))
+            continue
+        if request.get("command") == "shutdown":
+            shutdown = True
+            break
+        task = asyncio.ensure_future(handle_request(service, request, send))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    if shutdown:
+        await send({"ok": True})
+    return shutdown
+
+
+async def serve_socket(service: RenderService, socket_path: str) -> None:
+    """Serves the protocol on a Unix domain socket until a client sends shutdown."""
+    stop = asyncio.Event()
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if await serve_connection(service, reader, writer):
+                stop.set()
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(on_connect, path=socket_path, limit=DEFAULT_MAX_LINE_BYTES)
+    print(f"python code log: render service listening on {socket_path}", file=sys.stderr)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        os.remove(socket_path)
+
+
+async def serve_stdio(service: RenderService) -> None:
+    """Serves the protocol on stdin/stdout until EOF or shutdown."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=DEFAULT_MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    # Protocol lines go straight to the stdout pipe; anything else printed,
+    # from any render thread, goes to stderr.
+    sys.stdout = sys.stderr
+    await serve_connection(service, reader, writer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Asyncio render service with bounded concurrency, speaking a JSON-lines protocol."
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Unix socket path to listen on. Defaults to stdin/stdout.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Renders running at the same time.",
+    )
+    parser.add_argument(
+        "--max_queue",
+        type=int,
+        default=DEFAULT_MAX_QUEUE,
+        help="Jobs that may wait for a free worker; more are rejected as busy.",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Render in threads of this process or in worker processes.",
+    )
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    with RenderService(
+        args.workers, args.max_queue, args.executor, args.cache_dir, args.cache_max_mb * 1024 * 1024
+    ) as service:
+        if args.socket:
+            asyncio.run(serve_socket(service, args.socket))
+        else:
+            asyncio.run(serve_stdio(service))
@@ -0,0 +1,547 @@
+# template_engine.py
+#
+# Declarative templates. A layout (base PNG, overlay PNGs, photo slot, text
+# elements, date fields, watermark slot) is described in a JSON spec; see
+# template_specs/ for the newspaper and breaking news layouts. A spec is
+# validated and compiled once into a TemplatePlan with its fonts, overlay
+# paths and date formatters resolved, and plans are cached per spec file, so
+# adding a design is a new JSON file rather than a new Python module.
+#
+# Coordinates and font sizes in a spec are full-resolution pixels; they are
+# scaled like the rest of the pipeline (img_util.scale_value) at render time.
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw
+
+from cache_util import CacheInfo, LRUCache
+from date_util import DateFormat, clock_time, compile_date_formatter, date_bundle
+from font_cache import preload_fonts
+from img_util import (
+    ImageSource,
+    apply_watermark,
+    check_scale,
+    load_template_image,
+    open_image,
+    paste_photo,
+    scale_box,
+    scale_image,
+    scale_value,
+)
+from render_context import RenderContext, resolve_context
+from render_profile import stage
+from text_utils import (
+    DEFAULT_COLOR,
+    DEFAULT_LINE_SPACING,
+    DEFAULT_MAX_FONT_SIZE,
+    DEFAULT_MIN_FONT_SIZE,
+    draw_text_in_box,
+    draw_text_no_box,
+)
+
+# Default configuration constants
+DEFAULT_SPEC_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "template_specs")
+DEFAULT_PLAN_CACHE_SIZE: int = 64
+
+OVERLAY_BLENDS = ("composite", "paste")
+TEXT_ALIGNMENTS = ("left", "center", "right")
+VERTICAL_MODES = ("top_to_bottom", "center_expanded", "bottom_to_top")
+CLOCK_CALENDAR = "clock"
+
+_plans = LRUCache(DEFAULT_PLAN_CACHE_SIZE)
+
+# A spec value: a number, or {"by_events": [...]} picked by the number of events.
+SpecValue = Union[float, List[Any], Dict[str, List[Any]]]
+
+
+@dataclass(frozen=True)
+class Overlay:
+    """An overlay PNG; '{events}' in the path is replaced by the number of events."""
+
+    path: str
+    blend: str = "composite"  # 'composite' (alpha_composite) or 'paste' (paste with alpha mask)
+
+
+@dataclass(frozen=True)
+class PhotoSlot:
+    """
+    Where the user photo goes: either box (left, top, right, bottom) or
+    position (left, top) plus size (width, height).
+    """
+
+    box: Optional[Tuple[int, int, int, int]] = None
+    position: Optional[Tuple[int, int]] = None
+    size: Optional[Tuple[int, int]] = None
+
+    def region(self, scale: float) -> Tuple[int, int, int, int]:
+        """Returns the slot as (left, top, right, bottom) at a render scale."""
+        if self.box is not None:
+            return scale_box(self.box, scale)
+        left, top = scale_box(self.position, scale)
+        width, height = scale_box(self.size, scale)
+        return (left, top, left + width, top + height)
+
+
+@dataclass(frozen=True)
+class TextElement:
+    """
+    One text drawn by the template, from a call parameter, a date field, or
+    each event text. Elements with a box are wrapped and optionally auto-sized
+    (draw_text_in_box); the others are single labels at (x, y) (draw_text_no_box).
+    """
+
+    name: str
+    font_path: str
+    size: float
+    align: str
+    rtl: bool
+    color: Union[str, Tuple[int, ...]] = DEFAULT_COLOR
+    param: Optional[str] = None
+    date: Optional[str] = None
+    each_event: bool = False
+    x: Optional[SpecValue] = None  # number, {"by_events": ...} or 'center' of the image
+    y: Optional[SpecValue] = None
+    box: Optional[Union[Tuple[int, int, int, int], Dict[str, float]]] = None
+    vertical: str = "center_expanded"
+    line_spacing: float = DEFAULT_LINE_SPACING
+    size_delta_param: Optional[str] = None
+    auto_size_param: Optional[str] = None
+    max_size: float = DEFAULT_MAX_FONT_SIZE
+    min_size: float = DEFAULT_MIN_FONT_SIZE
+    text_options: bool = False  # receives the render's extra keyword arguments
+
+
+@dataclass(frozen=True)
+class WatermarkSlot:
+    path: str
+    position: Tuple[int, int]
+    scale: float = 1.0
+    opacity: float = 0.5
+    adaptive_color: bool = False
+    enabled_param: Optional[str] = None
+
+
+class TemplatePlan:
+    """
+    A compiled template spec, ready to render.
+
+    Attributes:
+        name: Template name.
+        source: Spec file path, if loaded from a file.
+        params: Call parameters and their defaults.
+        fonts: Font name -> path.
+        assets: Every file a render may read (spec, PNGs and fonts), for render cache keys.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base: str,
+        overlays: Tuple[Overlay, ...],
+        photo: Optional[PhotoSlot],
+        params: Dict[str, Any],
+        events: Tuple[str, ...],
+        fonts: Dict[str, str],
+        dates: Dict[str, Any],
+        texts: Tuple[TextElement, ...],
+        watermark: Optional[WatermarkSlot],
+        source: Optional[str] = None,
+    ):
+        self.name = name
+        self.base = base
+        self.overlays = overlays
+        self.photo = photo
+        self.params = params
+        self.events = events
+        self.fonts = fonts
+        self.texts = texts
+        self.watermark = watermark
+        self.source = source
+        self._dates: Dict[str, Callable[[Any, RenderContext], str]] = dates
+        self._takes_options = any(element.text_options for element in texts)
+
+        images = [base]
+        for overlay in overlays:
+            images += sorted({overlay.path.format(events=n) for n in range(len(events) + 1)})
+        if watermark is not None:
+            images.append(watermark.path)
+        self.image_paths: Tuple[str, ...] = tuple(images)
+        assets = list(images) + sorted(set(fonts.values()))
+        if source is not None:
+            assets.append(source)
+        self.assets: Tuple[str, ...] = tuple(assets)
+
+    def date_labels(self, context: RenderContext, days_into_future: int = 0) -> Dict[str, str]:
+        """Returns the text of every date field for a render context."""
+        bundle = date_bundle(context.timestamp, days_into_future)
+        return {name: label(bundle, context) for name, label in self._dates.items()}
+
+    def render(
+        self,
+        user_image_path: ImageSource,
+        composed: bool = False,
+        scale: float = 1.0,
+        photo_fit: str = "stretch",
+        context: Optional[RenderContext] = None,
+        days_into_future: int = 0,
+        **values,
+    ) -> Image.Image:
+        """
+        Renders the template in memory.
+
+        Args:
+            user_image_path: User photo (path, bytes or binary file-like object), or
+                             the pre-composed base image when composed is True.
+            composed: If True, skip the base template, photo slot and overlays.
+            scale: Render scale in (0, 1].
+            photo_fit: 'stretch', 'cover' or 'contain'.
+            context: The moment date fields are drawn for. Defaults to now.
+            days_into_future: Day offset of the date fields (not the clock).
+            **values: Template parameters (see params). Other keyword arguments
+                      go to the element marked text_options, if any.
+
+        Returns:
+            Image.Image: The finished RGBA image.
+        """
+        check_scale(scale)
+        args = dict(self.params)
+        options = {}
+        for key, value in values.items():
+            if key in args:
+                args[key] = value
+            else:
+                options[key] = value
+        if options and not self._takes_options:
+            raise TypeError(f"Template {self.name!r} got unexpected arguments {sorted(options)}.")
+
+        with stage("dates.labels"):
+            dates = self.date_labels(resolve_context(context), days_into_future)
+        event_texts = [args[name] for name in self.events if args[name]]
+
+        if composed:
+            with stage("photo"):
+                base_img = scale_image(open_image(user_image_path), scale).convert("RGBA")
+        else:
+            with stage("template"):
+                base_img = load_template_image(self.base, scale).copy()
+            if self.photo is not None:
+                with stage("photo"):
+                    paste_photo(base_img, user_image_path, self.photo.region(scale), fit=photo_fit)
+            with stage("template"):
+                for overlay in self.overlays:
+                    overlay_img = load_template_image(
+                        overlay.path.format(events=len(event_texts)), scale
+                    )
+                    if overlay.blend == "composite":
+                        base_img.alpha_composite(overlay_img)
+                    else:
+                        base_img.paste(overlay_img, (0, 0), overlay_img)
+
+        draw = ImageDraw.Draw(base_img)
+        for element in self.texts:
+            with stage(element.name):
+                _draw_element(draw, base_img.width, element, args, dates, event_texts, options, scale)
+
+        watermark = self.watermark
+        if watermark is not None and (watermark.enabled_param is None or args[watermark.enabled_param]):
+            base_img = apply_watermark(
+                base_img,
+                watermark.path,
+                position=scale_box(watermark.position, scale),
+                scale=watermark.scale * scale,
+                opacity=watermark.opacity,
+                adaptive_color=watermark.adaptive_color,
+                in_place=True,  # base_img is ours; skip the full-canvas copy
+            )
+        return base_img
+
+
+def _pick(value: SpecValue, num_events: int) -> Any:
+    if isinstance(value, dict):
+        return value["by_events"][num_events]
+    return value
+
+
+def _draw_element(
+    draw: ImageDraw.ImageDraw,
+    image_width: int,
+    element: TextElement,
+    args: Dict[str, Any],
+    dates: Dict[str, str],
+    event_texts: List[str],
+    options: Dict[str, Any],
+    scale: float,
+) -> None:
+    def px(value: float) -> int:
+        return scale_value(value, scale)
+
+    size = element.size
+    if element.size_delta_param is not None:
+        size += args[element.size_delta_param]
+    font_path = element.font_path
+
+    if element.box is not None:
+        box = element.box
+        if isinstance(box, dict):
+            # Full image width minus a margin on each side.
+            margin = px(box["margin_x"])
+            box = (margin, px(box["top"]), image_width - 2 * margin, px(box["height"]))
+        else:
+            box = scale_box(box, scale)
+        options = dict(options) if element.text_options else {}
+        # Auto-size bounds are full-resolution sizes too.
+        max_font_size = px(options.pop("max_font_size", element.max_size))
+        min_font_size = max(1, px(options.pop("min_font_size", element.min_size)))
+        auto_size = bool(args[element.auto_size_param]) if element.auto_size_param else False
+        draw_text_in_box(
+            draw,
+            args[element.param],
+            font_path,
+            box,
+            alignment=element.align,
+            vertical_mode=element.vertical,
+            auto_size=auto_size,
+            font_size=px(size),
+            max_font_size=max_font_size,
+            min_font_size=min_font_size,
+            color=element.color,
+            line_spacing=element.line_spacing,
+            is_rtl=element.rtl,
+            **options,
+        )
+        return
+
+    num_events = len(event_texts)
+    if element.each_event:
+        texts = event_texts
+        ys = [px(y) for y in _pick(element.y, num_events)]
+    elif element.date is not None:
+        texts = [dates[element.date]]
+        ys = [px(_pick(element.y, num_events))]
+    else:
+        texts = [args[element.param]]
+        ys = [px(_pick(element.y, num_events))]
+    x = image_width // 2 if element.x == "center" else px(_pick(element.x, num_events))
+    for text, y in zip(texts, ys):
+        draw_text_no_box(
+            draw,
+            text,
+            font_path,
+            x,
+            y,
+            alignment=element.align,
+            font_size=px(size),
+            color=element.color,
+            is_rtl=element.rtl,
+        )
+
+
+def _date_field(field: Dict[str, Any]) -> Callable[[Any, RenderContext], str]:
+    field = dict(field)
+    calendar = field.pop("calendar", None)
+    if calendar == CLOCK_CALENDAR:
+        return lambda bundle, context: clock_time(date=context.timestamp, **field)
+    spec = DateFormat(calendar, **field)
+    formatter = compile_date_formatter(spec)
+    return lambda bundle, context: formatter.format_bundle(bundle)
+
+
+def _check(condition: bool, template: str, message: str) -> None:
+    if not condition:
+        raise ValueError(f"Template spec {template!r}: {message}")
+
+
+def _check_value(value: Any, template: str, where: str, num_events: int) -> None:
+    if isinstance(value, dict):
+        picks = value.get("by_events")
+        _check(
+            isinstance(picks, list) and len(picks) == num_events + 1,
+            template,
+            f"{where}.by_events needs one entry per event count (0-{num_events}).",
+        )
+
+
+def compile_plan(spec: Dict[str, Any], source: Optional[str] = None) -> TemplatePlan:
+    """
+    Validates a template spec and compiles it into a TemplatePlan.
+
+    Args:
+        spec: The parsed spec (see template_specs/*.json).
+        source: Spec file path; included in the plan's assets.
+
+    Returns:
+        TemplatePlan: The compiled plan.
+
+    Raises:
+        ValueError: If the spec is malformed or refers to undefined fonts,
+                    parameters or date fields.
+    """
+    name = spec.get("name") or (os.path.splitext(os.path.basename(source))[0] if source else None)
+    _check(bool(name), "?", "a 'name' is required.")
+    _check("base" in spec, name, "a 'base' template image is required.")
+
+    params = dict(spec.get("params", {}))
+    events = tuple(spec.get("events", ()))
+    for param in events:
+        _check(param in params, name, f"event parameter {param!r} is not in params.")
+    fonts = dict(spec.get("fonts", {}))
+
+    overlays = []
+    for overlay in spec.get("overlays", ()):
+        blend = overlay.get("blend", "composite")
+        _check(blend in OVERLAY_BLENDS, name, f"overlay blend must be one of {OVERLAY_BLENDS}.")
+        overlays.append(Overlay(overlay["path"], blend))
+
+    photo = None
+    if "photo" in spec:
+        slot = spec["photo"]
+        if "box" in slot:
+            photo = PhotoSlot(box=tuple(slot["box"]))
+        else:
+            _check("position" in slot and "size" in slot, name, "photo needs a box or position and size.")
+            photo = PhotoSlot(position=tuple(slot["position"]), size=tuple(slot["size"]))
+
+    dates = {}
+    for field_name, field in spec.get("dates", {}).items():
+        try:
+            dates[field_name] = _date_field(field)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Template spec {name!r}: date field {field_name!r}: {exc}") from exc
+
+    texts = []
+    for element in spec.get("texts", ()):
+        element = dict(element)
+        where = f"text {element.get('name', '?')!r}"
+        sources = [key for key in ("param", "date", "each_event") if element.get(key)]
+        _check(len(sources) == 1, name, f"{where} needs exactly one of param, date or each_event.")
+        _check(element.get("font") in fonts, name, f"{where} uses undefined font {element.get('font')!r}.")
+        if element.get("param") is not None:
+            _check(element["param"] in params, name, f"{where} uses undefined param {element['param']!r}.")
+        if element.get("date") is not None:
+            _check(element["date"] in dates, name, f"{where} uses undefined date {element['date']!r}.")
+        for key in ("size_delta_param", "auto_size_param"):
+            if element.get(key) is not None:
+                _check(element[key] in params, name, f"{where} uses undefined param {element[key]!r}.")
+        if "box" in element:
+            _check(not element.get("each_event"), name, f"{where}: boxes hold a single text.")
+            _check(element.get("vertical", "center_expanded") in VERTICAL_MODES, name, f"{where}: bad vertical mode.")
+            box = element["box"]
+            if isinstance(box, list):
+                element["box"] = tuple(box)
+        else:
+            _check("x" in element and "y" in element, name, f"{where} needs x and y, or a box.")
+            _check_value(element["x"], name, f"{where}.x", len(events))
+            _check_value(element["y"], name, f"{where}.y", len(events))
+        _check(element.get("align", "left") in TEXT_ALIGNMENTS, name, f"{where}: bad alignment.")
+        color = element.get("color", DEFAULT_COLOR)
+        texts.append(
+            TextElement(
+                name=element.get("name", "text"),
+                font_path=fonts[element["font"]],
+                size=element["size"],
+                align=element.get("align", "center" if "box" in element else "left"),
+                rtl=element.get("rtl", True),
+                color=tuple(color) if isinstance(color, list) else color,
+                param=element.get("param"),
+                date=element.get("date"),
+                each_event=bool(element.get("each_event")),
+                x=element.get("x"),
+                y=element.get("y"),
+                box=element.get("box"),
+                vertical=element.get("vertical", "center_expanded"),
+                line_spacing=element.get("line_spacing", DEFAULT_LINE_SPACING),
+                size_delta_param=element.get("size_delta_param"),
+                auto_size_param=element.get("auto_size_param"),
+                max_size=element.get("max_size", DEFAULT_MAX_FONT_SIZE),
+                min_size=element.get("min_size", DEFAULT_MIN_FONT_SIZE),
+                text_options=bool(element.get("text_options")),
+            )
+        )
+    _check(sum(element.text_options for element in texts) <= 1, name, "only one text may take text_options.")
+
+    watermark = None
+    if "watermark" in spec:
+        slot = dict(spec["watermark"])
+        if slot.get("enabled_param") is not None:
+            _check(slot["enabled_param"] in params, name, "watermark.enabled_param is not in params.")
+        watermark = WatermarkSlot(
+            path=slot["path"],
+            position=tuple(slot["position"]),
+            scale=slot.get("scale", 1.0),
+            opacity=slot.get("opacity", 0.5),
+            adaptive_color=slot.get("adaptive_color", False),
+            enabled_param=slot.get("enabled_param"),
+        )
+
+    # Read the font files now, so the first render only sizes them.
+    preload_fonts(path for path in sorted(set(fonts.values())) if os.path.isfile(path))
+    return TemplatePlan(
+        name=name,
+        base=spec["base"],
+        overlays=tuple(overlays),
+        photo=photo,
+        params=params,
+        events=events,
+        fonts=fonts,
+        dates=dates,
+        texts=tuple(texts),
+        watermark=watermark,
+        source=source,
+    )
+
+
+def spec_path(name: str, spec_dir: str = DEFAULT_SPEC_DIR) -> str:
+    """Returns the spec file of a template name, or name itself if it is a .json path."""
+    if name.endswith(".json"):
+        return name
+    return os.path.join(spec_dir, f"{name}.json")
+
+
+def load_plan(name: str, spec_dir: str = DEFAULT_SPEC_DIR) -> TemplatePlan:
+    """
+    Returns the compiled plan of a template, compiling its spec file only once.
+
+    Plans are cached by spec path and recompiled when the file's mtime changes.
+
+    Args:
+        name: Template name (a spec in spec_dir) or a path to a .json spec.
+        spec_dir: Directory of spec files.
+
+    Returns:
+        TemplatePlan: The compiled plan.
+    """
+    path = os.path.abspath(spec_path(name, spec_dir))
+    mtime = os.stat(path).st_mtime_ns
+    cached = _plans.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    plan = compile_plan(spec, source=spec_path(name, spec_dir))
+    _plans.put(path, (mtime, plan))
+    return plan
+
+
+def available_templates(spec_dir: str = DEFAULT_SPEC_DIR) -> List[str]:
+    """Returns the names of the spec files in spec_dir."""
+    if not os.path.isdir(spec_dir):
+        return []
+    return sorted(name[:-5] for name in os.listdir(spec_dir) if name.endswith(".json"))
+
+
+def render_template(name: str, user_image_path: ImageSource, **kwargs) -> Image.Image:
+    """Renders a template by name; see TemplatePlan.render for the arguments."""
+    return load_plan(name).render(user_image_path, **kwargs)
+
+
+def plan_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the compiled plan cache."""
+    return _plans.info()
+
+
+def clear_plan_cache() -> None:
+    """Drops all compiled plans and resets the statistics."""
+    _plans.clear()
@@ -0,0 +1,109 @@
+# test_batch_render.py
+
+import json
+import os
+
+from PIL import Image
+
+import batch_render
+from batch_render import load_manifest, render_batch
+from render_jobs import set_render_cache
+
+
+def test_load_manifest_csv_parses_values(tmp_path):
+    manifest = tmp_path / "jobs.csv"
+    manifest.write_text(
+        "id,template,headline_text,font_size_delta,composed,output_path\n"
+        "a,breaking_news,خبر فوری,10,true,out.jpg\n"
+        ",breaking_news,2024,,false,out2.jpg\n",
+        encoding="utf-8",
+    )
+
+    jobs = load_manifest(str(manifest))
+
+    assert jobs[0]["id"] == "a"
+    assert jobs[0]["params"] == {
+        "headline_text": "خبر فوری",
+        "font_size_delta": 10,
+        "composed": True,
+        "output_path": "out.jpg",
+    }
+    assert jobs[1]["id"] == 2
+    assert jobs[1]["params"]["headline_text"] == "2024"
+    assert "font_size_delta" not in jobs[1]["params"]
+
+
+def test_render_batch_records_failures_without_aborting(tmp_path):
+    canvas = tmp_path / "composed.png"
+    Image.new("RGB", (400, 400), "white").save(canvas)
+    jobs = [
+        {"id": "missing", "template": "breaking_news", "params": {
+            "user_image_path": str(tmp_path / "nope.png"),
+            "headline_text": "خبر",
+            "output_path": str(tmp_path / "missing.jpg"),
+            "composed": True,
+        }},
+        {"id": "ok", "template": "breaking_news", "params": {
+            "user_image_path": str(canvas),
+            "headline_text": "خبر فوری",
+            "output_path": str(tmp_path / "ok.jpg"),
+            "composed": True,
+        }},
+    ]
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text("\n".join(json.dumps(job) for job in jobs), encoding="utf-8")
+
+    report = render_batch(load_manifest(str(manifest)))
+
+    assert [result["id"] for result in report["results"]] == ["missing", "ok"]
+    assert report["results"][0]["ok"] is False
+    assert report["results"][1]["ok"] is True
+    assert (tmp_path / "ok.jpg").exists()
+    assert report["summary"]["failed"] == 1
+
+
+def test_render_batch_with_worker_pool_keeps_input_order():
+    jobs = [{"id": index, "template": "unknown"} for index in range(5)]
+
+    report = render_batch(jobs, workers=2)
+
+    assert [result["id"] for result in report["results"]] == list(range(5))
+    assert report["summary"]["workers"] == 2
+    assert report["summary"]["failed"] == 5
+
+
+def test_render_batch_applies_cache_size_limit(tmp_path):
+    canvas = tmp_path / "composed.png"
+    Image.new("RGB", (400, 400), "white").save(canvas)
+    job = {"template": "breaking_news", "return": "bytes", "params": {
+        "user_image_path": str(canvas), "headline_text": "خبر", "composed": True,
+    }}
+    jobs = [dict(job, id=1), dict(job, id=2)]
+
+    try:
+        roomy = render_batch(jobs, cache_dir=str(tmp_path / "roomy"))
+        tiny = render_batch(jobs, cache_dir=str(tmp_path / "tiny"), cache_max_bytes=1024)
+    finally:
+        set_render_cache(None)
+
+    assert [result["cache"] for result in roomy["results"]] == ["miss", "hit"]
+    # Every render is bigger than the limit and is evicted as soon as it is stored.
+    assert [result["cache"] for result in tiny["results"]] == ["miss", "miss"]
+
+
+def _crash_on_second_job(job, redirect_stdout=True):
+    if job["id"] == 2:
+        os._exit(1)  # a worker dying mid-render, e.g. killed for memory
+    return {"id": job["id"], "ok": True, "elapsed_ms": 0.0}
+
+
+def test_render_batch_records_jobs_lost_to_a_dead_worker(monkeypatch):
+    monkeypatch.setattr(batch_render, "run_job", _crash_on_second_job)
+    jobs = [{"id": index, "template": "breaking_news"} for index in range(5)]
+
+    report = render_batch(jobs, workers=2)
+
+    assert [result["id"] for result in report["results"]] == list(range(5))
+    assert report["results"][0]["ok"] is True
+    assert "BrokenProcessPool" in report["results"][2]["error"]
+    assert report["summary"]["jobs"] == 5 and report["summary"]["failed"] >= 3
@@ -0,0 +1,74 @@
+# test_date_util.py
+
+from datetime import date, datetime
+
+import pytest
+from convertdate import persian
+
+import date_util
+
+
+@pytest.fixture(autouse=True)
+def fresh_date_cache():
+    date_util.clear_date_cache()
+    yield
+    date_util.clear_date_cache()
+
+
+def test_date_bundle_is_shared_per_civil_day():
+    morning = datetime(2025, 3, 20, 8, 0)
+    evening = datetime(2025, 3, 19, 23, 0)
+
+    first = date_util.date_bundle(morning)
+    second = date_util.date_bundle(evening, days_into_future=1)
+
+    assert first is second
+    assert date_util.date_cache_info().hits == 1
+
+
+def test_formatters_read_from_bundle():
+    when = datetime(2025, 3, 21, 12, 0)  # 1 Farvardin 1404, a Friday
+
+    assert date_util.shamsi(True, True, True, date=when) == "۱ فروردین ۱۴۰۴"
+    assert date_util.shamsi(True, True, True, language="english", date=when) == "1 Farvardin 1404"
+    assert date_util.georgian(True, True, True, date=when) == "21 March 2025"
+    assert date_util.day_of_week(date=when) == "جمعه"
+    assert date_util.arabic(False, True, False, date=when, month_format="number") == "۹"
+
+
+def test_precompute_date_table_steps_shamsi_across_new_year():
+    table = date_util.precompute_date_table(date(2025, 3, 1), days=60)
+
+    assert len(table) == 60
+    for bundle in table[15:25]:  # around Nowruz, where Esfand's length matters
+        day = bundle.date
+        assert bundle.shamsi == tuple(persian.from_gregorian(day.year, day.month, day.day))
+    assert date_util.date_bundle(date(2025, 3, 1), days_into_future=59) is table[-1]
+
+
+def test_precompute_date_table_grows_cache():
+    date_util.precompute_date_table(date(2024, 1, 1), days=500)
+
+    assert date_util.date_cache_info().currsize == 500
+
+
+def test_to_farsi_numerals_keeps_other_characters():
+    assert date_util.to_farsi_numerals("12:05 AM") == "۱۲:۰۵ AM"
+
+
+def test_compiled_formatter_matches_wrapper():
+    when = datetime(2025, 3, 21, 12, 0)
+    spec = date_util.DateFormat("islamic", ("year", "month"), "Farsi", "/", "number")
+    formatter = date_util.compile_date_formatter(spec)
+
+    assert date_util.compile_date_formatter(spec) is formatter
+    assert formatter(when) == date_util.to_farsi_numerals("1446/9")
+    assert formatter.format_bundle(date_util.date_bundle(when)) == formatter(when)
+    assert date_util.compile_date_formatter(date_util.DateFormat("weekday", short=True))(when) == "جمعه"
+
+
+def test_date_format_rejects_unknown_parts():
+    with pytest.raises(ValueError):
+        date_util.DateFormat("julian")
+    with pytest.raises(ValueError):
+        date_util.DateFormat("shamsi", ("day", "hour"))
@@ -0,0 +1,55 @@
+# test_font_cache.py
+
+import pytest
+from PIL import ImageFont
+
+import font_cache
+from cache_util import LRUCache
+
+FONT_PATH = "assets/Font/Sahel.ttf"
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    font_cache.clear_font_cache()
+    yield
+    font_cache.clear_font_cache()
+    font_cache.set_font_cache_size(font_cache.DEFAULT_FONT_CACHE_SIZE)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest entry
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.info().currsize == 2
+
+
+def test_get_font_returns_shared_instance():
+    first = font_cache.get_font(FONT_PATH, 40)
+    second = font_cache.get_font(FONT_PATH, 40)
+
+    assert first is second
+    assert isinstance(first, ImageFont.FreeTypeFont)
+    info = font_cache.font_cache_info()
+    assert info["fonts"].hits == 1 and info["fonts"].misses == 1
+
+
+def test_font_file_is_read_once_for_all_sizes():
+    for size in (20, 30, 40):
+        font_cache.get_font(FONT_PATH, size)
+
+    assert font_cache.font_cache_info()["files"].misses == 1
+    assert font_cache.font_cache_info()["files"].currsize == 1
+
+
+def test_font_cache_is_bounded():
+    font_cache.set_font_cache_size(2)
+    for size in (20, 30, 40):
+        font_cache.get_font(FONT_PATH, size)
+
+    assert font_cache.font_cache_info()["fonts"].currsize == 2
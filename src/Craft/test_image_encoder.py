@@ -0,0 +1,70 @@
+# test_image_encoder.py
+
+import io
+
+import pytest
+from PIL import Image
+
+from image_encoder import EncoderSettings, encode_image, preview_path_for, save_encoded
+
+
+def _noisy_image(size=(400, 300)):
+    # Noise keeps the encoded size sensitive to quality.
+    return Image.effect_noise(size, 64).convert("RGBA")
+
+
+def test_default_settings_match_original_jpeg_output():
+    img = _noisy_image()
+    buffer = io.BytesIO()
+    img.convert("RGB").save(buffer, format="JPEG", quality=95)
+
+    assert encode_image(img).data == buffer.getvalue()
+
+
+def test_webp_and_progressive_jpeg_decode():
+    img = _noisy_image()
+    webp = encode_image(img, EncoderSettings(format="webp", quality=80))
+    progressive = encode_image(img, EncoderSettings(progressive=True, optimize=True))
+
+    assert Image.open(io.BytesIO(webp.data)).format == "WEBP"
+    assert webp.report.format == "WEBP"
+    decoded = Image.open(io.BytesIO(progressive.data))
+    assert decoded.info.get("progressive") == 1
+
+
+def test_max_bytes_searches_highest_fitting_quality():
+    img = _noisy_image()
+    full = encode_image(img).report.bytes
+    settings = EncoderSettings(max_bytes=full // 2)
+
+    encoded = encode_image(img, settings)
+
+    assert encoded.report.target_met is True
+    assert len(encoded.data) <= settings.max_bytes
+    assert encoded.report.quality < 95
+    higher = encode_image(img, EncoderSettings(quality=encoded.report.quality + 1))
+    assert higher.report.bytes > settings.max_bytes
+
+
+def test_max_bytes_unreachable_returns_min_quality():
+    encoded = encode_image(_noisy_image(), EncoderSettings(max_bytes=10, min_quality=30))
+
+    assert encoded.report.target_met is False
+    assert encoded.report.quality == 30
+
+
+def test_preview_written_next_to_output(tmp_path):
+    output = tmp_path / "out.jpg"
+    encoded = save_encoded(_noisy_image(), str(output), EncoderSettings(preview_max_side=100))
+
+    assert output.read_bytes() == encoded.data
+    assert encoded.report.preview_path == preview_path_for(str(output))
+    with Image.open(encoded.report.preview_path) as preview:
+        assert max(preview.size) == 100
+
+
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError):
+        EncoderSettings(format="GIF")
+    with pytest.raises(ValueError):
+        EncoderSettings(quality=30, min_quality=50)
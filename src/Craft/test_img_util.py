@@ -0,0 +1,169 @@
+# test_img_util.py
+
+import io
+import os
+
+import pytest
+from PIL import Image, JpegImagePlugin
+
+import img_util
+
+
+@pytest.fixture(autouse=True)
+def fresh_template_cache():
+    img_util.clear_template_cache()
+    yield
+    img_util.clear_template_cache()
+
+
+def test_load_template_image_decodes_once(tmp_path):
+    path = tmp_path / "template.png"
+    Image.new("RGB", (8, 8), "red").save(path)
+
+    first = img_util.load_template_image(str(path))
+    second = img_util.load_template_image(str(path))
+
+    assert first is second
+    assert first.mode == "RGBA"
+    assert img_util.template_cache_info().hits == 1
+
+
+def test_load_template_image_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "template.png"
+    Image.new("RGB", (8, 8), "red").save(path)
+    first = img_util.load_template_image(str(path))
+
+    Image.new("RGB", (8, 8), "blue").save(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = img_util.load_template_image(str(path))
+
+    assert second is not first
+    assert second.getpixel((0, 0)) == (0, 0, 255, 255)
+
+
+def test_apply_watermark_in_place_reuses_base_image():
+    base = Image.new("RGBA", (100, 100), "white")
+    watermark = Image.new("RGBA", (20, 20), (255, 255, 255, 255))
+
+    result = img_util.apply_watermark(
+        base, watermark, position=(10, 10), opacity=1.0, adaptive_color=True, in_place=True
+    )
+
+    assert result is base
+    # White background -> adaptive color picks a black watermark.
+    assert result.getpixel((15, 15)) == (0, 0, 0, 255)
+    assert result.getpixel((50, 50)) == (255, 255, 255, 255)
+
+
+def test_apply_watermark_copies_by_default():
+    base = Image.new("RGBA", (100, 100), "white")
+    watermark = Image.new("RGBA", (20, 20), (255, 255, 255, 255))
+
+    result = img_util.apply_watermark(base, watermark, position=(10, 10), opacity=0.5, color="red")
+
+    assert result is not base
+    assert base.getpixel((15, 15)) == (255, 255, 255, 255)
+    assert result.getpixel((15, 15)) == (255, 128, 128, 255)
+
+
+def test_apply_watermark_prepares_each_variant_once(tmp_path):
+    img_util.clear_watermark_cache()
+    path = tmp_path / "watermark.png"
+    Image.new("RGBA", (40, 20), (255, 255, 255, 200)).save(path)
+    dark = Image.new("RGBA", (200, 200), "black")
+    light = Image.new("RGBA", (200, 200), "white")
+
+    for base in (dark, light, dark):
+        img_util.apply_watermark(
+            base, str(path), position=(10, 10), scale=2, opacity=0.8, adaptive_color=True
+        )
+
+    # Black and white tints share one prepared mask for this size and opacity.
+    info = img_util.watermark_cache_info()
+    assert (info.misses, info.hits, info.currsize) == (1, 2, 1)
+
+
+def test_load_template_image_caches_each_scale(tmp_path):
+    path = tmp_path / "template.png"
+    Image.new("RGB", (400, 300), "red").save(path)
+
+    half = img_util.load_template_image(str(path), scale=0.5)
+
+    assert half.size == (200, 150)
+    assert img_util.load_template_image(str(path), scale=0.5) is half
+    # The full-size decode is cached as well and reused by other scales.
+    assert img_util.load_template_image(str(path)).size == (400, 300)
+    assert img_util.load_template_image(str(path), scale=0.25).size == (100, 75)
+    assert img_util.template_cache_info().currsize == 3
+
+
+def test_check_scale_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        img_util.check_scale(0)
+    with pytest.raises(ValueError):
+        img_util.check_scale(1.5)
+
+
+def _jpeg_bytes(size, color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "fit, expected", [("stretch", (300, 100)), ("cover", (300, 100)), ("contain", (133, 100))]
+)
+def test_load_photo_fits(fit, expected):
+    photo = img_util.load_photo(_jpeg_bytes((1600, 1200)), (300, 100), fit=fit)
+
+    assert photo.size == expected
+    # Opaque JPEGs are never widened to RGBA.
+    assert photo.mode == "RGB"
+
+
+def test_load_photo_uses_jpeg_draft_decoding(monkeypatch):
+    drafted = []
+    original = JpegImagePlugin.JpegImageFile.draft
+
+    def spy(self, mode, size):
+        result = original(self, mode, size)
+        drafted.append(self.size)
+        return result
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", spy)
+    img_util.load_photo(_jpeg_bytes((1600, 1200)), (200, 150))
+
+    # 1600x1200 into 200x150 decodes at 1/8 scale.
+    assert drafted == [(200, 150)]
+
+
+def test_load_photo_keeps_transparency():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (40, 40), (255, 0, 0, 0)).save(buffer, format="PNG")
+
+    photo = img_util.load_photo(buffer.getvalue(), (20, 20))
+
+    assert photo.mode == "RGBA"
+    assert photo.getpixel((10, 10))[3] == 0
+
+
+def test_paste_photo_centers_contained_photo():
+    base = Image.new("RGBA", (300, 100), "white")
+
+    img_util.paste_photo(base, _jpeg_bytes((100, 100), "black"), (0, 0, 300, 100), fit="contain")
+
+    assert base.getpixel((5, 50)) == (255, 255, 255, 255)
+    assert base.getpixel((150, 50))[:3] < (10, 10, 10)
+
+
+def test_load_photo_cover_full_height_crop_stays_inside_image():
+    # 2520 / (2520 / 900) is a hair over 900; the crop box must not leave the image.
+    photo = img_util.load_photo(_jpeg_bytes((1200, 900)), (2110, 2520), fit="cover")
+
+    assert photo.size == (2110, 2520)
+
+
+def test_load_photo_rejects_unknown_fit():
+    with pytest.raises(ValueError):
+        img_util.load_photo(_jpeg_bytes((10, 10)), (5, 5), fit="crop")
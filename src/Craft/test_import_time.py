@@ -0,0 +1,86 @@
+# test_import_time.py
+#
+# Cold-start budget of the template CLIs. Every bot render without the render
+# server starts a fresh interpreter, so the modules a single render imports are
+# measured with `python -X importtime` in a subprocess.
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+CRAFT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(CRAFT_DIR))
+
+# Self import time, in ms, of this repository's own modules during one render:
+# about 20 ms on a development machine (compiling from source). Third-party
+# imports such as Pillow are left out, since their cost depends on the runner
+# and not on this code; the budget leaves room for slower CI machines.
+COLD_START_IMPORT_BUDGET_MS = 200
+
+# Loaded only by the features that use them.
+LAZY_MODULES = ("arabic_reshaper", "bidi", "convertdate", "PIL.ImageStat", "PIL.ImageEnhance")
+
+# Modules this repository owns: the Python files next to this one.
+OWN_MODULES = {name[:-3] for name in os.listdir(CRAFT_DIR) if name.endswith(".py")}
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| +(\S.*)$")
+
+RENDER_ONE = """
+import io
+from PIL import Image
+buffer = io.BytesIO()
+Image.new("RGB", (1000, 1000), "white").save(buffer, format="PNG")
+from breaking_news_template import create_breaking_news_image
+from render_context import RenderContext
+create_breaking_news_image(
+    buffer.getvalue(), "Breaking", output_path=None, composed=True, scale=0.25,
+    context=RenderContext.at("2025-03-21T12:00:00+03:30"),
+)
+"""
+
+
+def _run(code, importtime=False):
+    env = dict(os.environ, PYTHONPATH=CRAFT_DIR, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("CRAFT_PROFILE", None)
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    result = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    return result
+
+
+def _self_import_times(code):
+    """Returns {module: self ms} of the imports made while running code."""
+    imports = {}
+    for line in _run(code, importtime=True).stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            imports[match.group(2)] = int(match.group(1)) / 1000
+    return imports
+
+
+def test_importing_templates_skips_optional_dependencies():
+    code = "import sys, json, newspaper_template, breaking_news_template; print(json.dumps(sorted(sys.modules)))"
+    loaded = set(json.loads(_run(code).stdout))
+
+    eager = [name for name in loaded if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+    assert not eager
+
+
+def test_importing_templates_does_not_load_plans():
+    code = (
+        "import render_jobs, batch_render, template_engine, font_cache; "
+        "print(template_engine.plan_cache_info().currsize, font_cache.font_cache_info()['files'].currsize)"
+    )
+    assert _run(code).stdout.split() == ["0", "0"]
+
+
+def test_single_render_import_budget():
+    imports = _self_import_times(RENDER_ONE)
+
+    own = {name: ms for name, ms in imports.items() if name in OWN_MODULES}
+    total = sum(own.values())
+    slowest = sorted(own.items(), key=lambda item: -item[1])[:5]
+    assert total < COLD_START_IMPORT_BUDGET_MS, f"{total:.0f} ms of imports; slowest: {slowest}"
+    # Breaking news draws left-to-right text only.
+    assert "arabic_reshaper" not in imports and "bidi" not in imports
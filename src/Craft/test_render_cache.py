@@ -0,0 +1,155 @@
+# test_render_cache.py
+
+import io
+import json
+import os
+
+from PIL import Image
+
+import breaking_news_template
+import render_cache
+from breaking_news_template import create_breaking_news_image
+from image_encoder import EncoderSettings
+from render_cache import RenderCache, render_key
+from render_context import RenderContext
+from template_engine import load_plan, spec_path
+
+CONTEXT = RenderContext.at("2025-03-21T12:00:00+03:30")
+
+
+def _photo_bytes(color="white"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _key(**overrides):
+    params = {
+        "user_image_path": _photo_bytes(),
+        "headline_text": "خبر فوری",
+        "composed": True,
+        "context": CONTEXT,
+    }
+    encoder = overrides.pop("encoder", None)
+    params.update(overrides)
+    key, _ = render_key(
+        "breaking_news",
+        breaking_news_template.build_breaking_news_image,
+        params,
+        breaking_news_template.date_labels,
+        load_plan(breaking_news_template.TEMPLATE_NAME).assets,
+        encoder,
+    )
+    return key
+
+
+def test_hit_returns_identical_bytes_without_rendering(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path / "cache"))
+    photo = _photo_bytes()
+    first = create_breaking_news_image(
+        photo, "خبر فوری", output_path=None, composed=True, context=CONTEXT, cache=cache
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rendered on a cache hit")
+
+    monkeypatch.setattr(render_cache, "save_encoded", fail)
+    output = tmp_path / "out.jpg"
+    create_breaking_news_image(
+        photo, "خبر فوری", output_path=str(output), composed=True, context=CONTEXT, cache=cache
+    )
+
+    assert output.read_bytes() == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_tracks_inputs_that_change_the_image():
+    base = _key()
+
+    assert _key() == base
+    assert _key(headline_text="خبر") != base
+    assert _key(user_image_path=_photo_bytes("black")) != base
+    assert _key(font_size_delta=5) != base
+    assert _key(encoder=EncoderSettings(quality=80)) != base
+    # Only the drawn labels matter: a second later on the same minute is the same render.
+    assert _key(context=RenderContext.at("2025-03-21T12:00:01+03:30")) == base
+    assert _key(context=RenderContext.at("2025-03-21T12:01:00+03:30")) != base
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=250)
+    for key in ("aa1", "bb2"):
+        cache.put(key, b"x" * 100)
+    os.utime(cache._path("aa1"), ns=(1, 1))
+    os.utime(cache._path("bb2"), ns=(2, 2))
+    assert cache.get("aa1") is not None  # refreshes aa1
+
+    cache.put("cc3", b"x" * 100)
+
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") is not None and cache.get("cc3") is not None
+    assert cache.info()["bytes"] == 200
+
+
+def test_overwriting_a_key_keeps_the_byte_total(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=1000)
+    cache.put("aa1", b"x" * 100)
+    for _ in range(3):
+        cache.put("bb2", b"y" * 100, preview=b"p" * 10)
+
+    assert cache._total == cache.info()["bytes"] == 210
+
+
+def test_preview_evicted_with_its_render(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=350)
+    for key in ("aa1", "bb2"):
+        cache.put(key, b"x" * 100, preview=b"p" * 50)
+    os.utime(cache._path("aa1.preview"), ns=(1, 1))  # older than every other file
+    os.utime(cache._path("aa1"), ns=(3, 3))
+    for name in ("bb2", "bb2.preview"):
+        os.utime(cache._path(name), ns=(2, 2))
+
+    cache.put("cc3", b"x" * 100)
+
+    assert cache.get_entry("aa1", with_preview=True) == (b"x" * 100, b"p" * 50)
+    assert cache.get_entry("bb2") is None
+    assert not os.path.exists(cache._path("bb2.preview"))
+    assert cache.info()["bytes"] == 250
+
+
+def test_preview_stored_with_render(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    encoder = EncoderSettings(preview_max_side=64)
+    kwargs = dict(output_path=None, composed=True, context=CONTEXT, encoder=encoder, cache=cache)
+    create_breaking_news_image(_photo_bytes(), "Breaking", **kwargs)
+
+    output = tmp_path / "out.jpg"
+    create_breaking_news_image(
+        _photo_bytes(), "Breaking", **dict(kwargs, output_path=str(output))
+    )
+
+    assert (cache.hits, cache.misses) == (1, 1)  # the preview is part of the render
+    with Image.open(tmp_path / "out.preview.jpg") as preview:
+        assert preview.size == (64, 64)
+
+
+def test_spec_edit_invalidates_cached_renders(tmp_path, monkeypatch):
+    with open(spec_path(breaking_news_template.TEMPLATE_NAME), encoding="utf-8") as f:
+        spec = json.load(f)
+    path = tmp_path / "breaking_news.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    monkeypatch.setattr(breaking_news_template, "TEMPLATE_NAME", str(path))
+    cache = RenderCache(str(tmp_path / "cache"))
+
+    def render():
+        return create_breaking_news_image(
+            _photo_bytes(), "خبر فوری", output_path=None, composed=True, context=CONTEXT, cache=cache
+        )
+
+    render()
+    spec["fonts"]["headline"] = "./assets/Font/Sahel.ttf"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+
+    render()
+    assert (cache.hits, cache.misses) == (0, 2)
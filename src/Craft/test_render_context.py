@@ -0,0 +1,69 @@
+# test_render_context.py
+
+import io
+import time
+from datetime import datetime
+
+from PIL import Image
+
+from breaking_news_template import create_breaking_news_image
+from date_util import clock_time, shamsi
+from render_context import RenderContext
+
+
+def test_context_converts_to_requested_timezone():
+    context = RenderContext.at("2025-03-20T22:00:00+00:00", timezone="Asia/Tehran")
+
+    # 22:00 UTC is already the next day (and Nowruz) in Tehran.
+    assert context.timestamp.isoformat() == "2025-03-21T01:30:00+03:30"
+    assert shamsi(True, True, True, date=context.timestamp) == "۱ فروردین ۱۴۰۴"
+    assert clock_time(date=context.timestamp) == "۰۱:۳۰"
+
+
+def test_context_round_trips_through_dict(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Tehran")
+    time.tzset()
+    contexts = [
+        RenderContext.at(1742500000, timezone="UTC"),
+        RenderContext.at(1742500000, timezone="Asia/Tehran"),
+        RenderContext.at("2025-03-21T12:00:00+03:30"),
+        RenderContext.now(),
+    ]
+    monkeypatch.undo()
+    time.tzset()
+
+    for context in contexts:
+        restored = RenderContext.from_dict(context.as_dict())
+        assert restored == context
+        assert restored.timestamp.isoformat() == context.timestamp.isoformat()
+
+
+def test_naive_timestamp_is_taken_as_local_time():
+    naive = datetime(2025, 1, 1, 12, 0)
+
+    assert RenderContext(naive).timestamp.tzinfo is not None
+
+
+def test_same_context_renders_identical_bytes():
+    buffer = io.BytesIO()
+    # Full template size, so the date and clock land on the canvas.
+    Image.new("RGB", (4000, 5000), "white").save(buffer, format="JPEG")
+    context = RenderContext.at("2025-03-21T12:34:00+03:30")
+
+    renders = [
+        create_breaking_news_image(
+            buffer.getvalue(), "Breaking", None, composed=True, scale=0.1, context=context
+        )
+        for _ in range(2)
+    ]
+    later = create_breaking_news_image(
+        buffer.getvalue(),
+        "Breaking",
+        None,
+        composed=True,
+        scale=0.1,
+        context=RenderContext.at("2025-03-21T18:00:00+03:30"),
+    )
+
+    assert renders[0] == renders[1]
+    assert later != renders[0]
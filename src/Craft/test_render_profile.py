@@ -0,0 +1,76 @@
+# test_render_profile.py
+
+import io
+import json
+
+from PIL import Image
+
+import render_profile
+from breaking_news_template import create_breaking_news_image
+from render_context import RenderContext
+from render_jobs import run_job
+
+CONTEXT = RenderContext.at("2025-03-21T12:00:00+03:30")
+
+
+def _photo_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_hooks_are_no_ops_without_a_profile():
+    assert render_profile.active_profile() is None
+    assert render_profile.stage("photo") is render_profile.stage("encode")
+    render_profile.count("fonts_loaded")  # must not raise
+
+    @render_profile.timed("work")
+    def work(value):
+        return value * 2
+
+    assert work(21) == 42
+
+
+def test_profiling_records_stages_and_counters():
+    with render_profile.profiling("breaking_news") as profile:
+        create_breaking_news_image(
+            _photo_bytes(), "خبر فوری", output_path=None, composed=True, context=CONTEXT
+        )
+
+    report = profile.as_dict()
+    assert report["name"] == "breaking_news"
+    for name in ("dates.labels", "photo", "headline", "text.layout", "dates.draw", "encode"):
+        assert report["stages"][name]["ns"] > 0
+    assert report["stages"]["text.label"]["calls"] == 2
+    assert report["counters"]["textbbox_calls"] > 0
+    assert report["total_ns"] >= report["stages"]["encode"]["ns"]
+    assert render_profile.active_profile() is None
+
+
+def test_profile_flag_and_env_write_json_to_stderr(capsys, monkeypatch):
+    create_breaking_news_image(
+        _photo_bytes(), "Breaking", output_path=None, composed=True, context=CONTEXT, profile=True
+    )
+    monkeypatch.setenv(render_profile.PROFILE_ENV_VAR, "1")
+    create_breaking_news_image(
+        _photo_bytes(), "Breaking", output_path=None, composed=True, context=CONTEXT
+    )
+
+    reports = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [report["name"] for report in reports] == ["breaking_news", "breaking_news"]
+    assert "encode" in reports[0]["stages"]
+
+
+def test_run_job_returns_profile_on_request():
+    job = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "profile": True,
+        "params": {"user_image_path": _photo_bytes(), "headline_text": "خبر", "composed": True},
+    }
+
+    result = run_job(job)
+
+    assert result["ok"] is True, result.get("error")
+    assert result["profile"]["stages"]["encode"]["calls"] == 1
+    assert "profile" not in run_job(dict(job, profile=False))
@@ -0,0 +1,120 @@
+# test_render_server.py
+
+import base64
+import io
+import json
+
+from PIL import Image
+
+import render_jobs
+from render_server import handle_line, serve_stream
+
+
+def test_handle_line_ping():
+    response = handle_line('{"command": "ping", "id": 7}')
+    assert response == {"id": 7, "ok": True, "pong": True}
+
+
+def test_handle_line_invalid_json():
+    response = handle_line("not json")
+    assert response["ok"] is False
+    assert "Invalid request" in response["error"]
+
+
+def test_handle_line_unknown_template_does_not_raise():
+    response = handle_line('{"id": 1, "template": "missing", "params": {}}')
+    assert response["ok"] is False
+    assert response["id"] == 1
+
+
+def test_serve_stream_stops_on_shutdown():
+    reader = io.StringIO(
+        '{"command": "ping"}\n\n{"command": "shutdown"}\n{"command": "ping"}\n'
+    )
+    writer = io.StringIO()
+
+    assert serve_stream(reader, writer) is True
+
+    responses = [json.loads(line) for line in writer.getvalue().splitlines()]
+    assert responses == [{"id": None, "ok": True, "pong": True}, {"ok": True}]
+
+
+def test_render_bytes_round_trip_without_files():
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), "white").save(buffer, format="PNG")
+    request = {
+        "id": "inline",
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {"headline_text": "خبر فوری", "composed": True},
+    }
+
+    response = handle_line(json.dumps(request))
+
+    assert response["ok"] is True, response.get("error")
+    image = Image.open(io.BytesIO(base64.b64decode(response["image_base64"])))
+    assert image.format == "JPEG" and image.size == (300, 300)
+    assert response["encode"]["bytes"] == len(base64.b64decode(response["image_base64"]))
+
+
+def test_render_reports_encoder_settings_and_preview():
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), "white").save(buffer, format="PNG")
+    request = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {
+            "headline_text": "Breaking",
+            "composed": True,
+            "encoder": {"format": "WEBP", "quality": 70, "preview_max_side": 64},
+        },
+    }
+
+    response = handle_line(json.dumps(request))
+
+    assert response["ok"] is True, response.get("error")
+    assert response["encode"]["format"] == "WEBP"
+    preview = Image.open(io.BytesIO(base64.b64decode(response["preview_base64"])))
+    assert preview.format == "WEBP" and preview.size == (64, 64)
+
+
+def test_render_scale_produces_draft_preview():
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 1000), "white").save(buffer, format="PNG")
+    request = {
+        "template": "newspaper",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {
+            "overline_text": "Overline",
+            "main_headline_text": "Headline",
+            "composed": True,
+            "watermark": False,
+            "scale": 0.25,
+        },
+    }
+
+    response = handle_line(json.dumps(request))
+
+    assert response["ok"] is True, response.get("error")
+    assert (response["encode"]["width"], response["encode"]["height"]) == (200, 250)
+
+
+def test_builtin_templates_skip_listing_spec_directory(monkeypatch):
+    listed = []
+    monkeypatch.setattr(render_jobs, "available_templates", lambda: listed.append(True) or [])
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 100), "white").save(buffer, format="PNG")
+    request = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {"headline_text": "Breaking", "composed": True},
+    }
+
+    assert handle_line(json.dumps(request))["ok"] is True
+    assert not listed
+    assert handle_line(json.dumps(dict(request, template="missing")))["ok"] is False
+    assert listed == [True]
@@ -0,0 +1,211 @@
+# test_render_service.py
+
+import asyncio
+import base64
+import io
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import render_jobs
+import render_service
+from render_service import RenderService, serve_connection
+
+
+class _Writer:
+    """Collects what serve_connection writes, one parsed response per line."""
+
+    def __init__(self):
+        self.responses = []
+
+    def write(self, data):
+        self.responses.extend(json.loads(line) for line in data.decode("utf-8").splitlines())
+
+    async def drain(self):
+        pass
+
+
+def _reader(*requests):
+    reader = asyncio.StreamReader()
+    for request in requests:
+        reader.feed_data((json.dumps(request) + "\n").encode("utf-8"))
+    reader.feed_eof()
+    return reader
+
+
+@pytest.fixture
+def blocking_jobs(monkeypatch):
+    """Replaces run_job with a job that holds its worker until released, counting overlap."""
+    release = threading.Event()
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fake_run_job(job, redirect_stdout=True):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        release.wait(5)
+        time.sleep(job.get("delay", 0))
+        with lock:
+            state["running"] -= 1
+        return {"id": job.get("id"), "ok": not job.get("fail", False)}
+
+    monkeypatch.setattr(render_service, "run_job", fake_run_job)
+    return release, state
+
+
+def test_limits_concurrency_and_rejects_past_queue_depth(blocking_jobs):
+    release, state = blocking_jobs
+
+    async def main(service):
+        tasks = [asyncio.ensure_future(service.render({"id": i})) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert service.info()["pending"] == 3
+
+        start = time.perf_counter()
+        with pytest.raises(asyncio.QueueFull):
+            await service.render({"id": "late"})
+        assert time.perf_counter() - start < 0.05  # rejected without waiting
+
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    with RenderService(max_concurrency=2, max_queue=1) as service:
+        results = asyncio.run(main(service))
+
+    assert [result["id"] for result in results] == [0, 1, 2]
+    assert state["peak"] == 2
+    assert service.info() == {
+        "max_concurrency": 2, "max_queue": 1, "pending": 0, "completed": 3, "rejected": 1,
+    }
+
+
+def test_variants_stream_in_completion_order(blocking_jobs):
+    release, _ = blocking_jobs
+    release.set()
+    jobs = [{"id": "large", "delay": 0.3}, {"id": "small", "delay": 0.0}, {"id": "caption", "delay": 0.15}]
+
+    async def main(service):
+        return [(index, result["id"]) async for index, result in service.render_variants(jobs)]
+
+    with RenderService(max_concurrency=3, max_queue=0) as service:
+        assert asyncio.run(main(service)) == [(1, "small"), (2, "caption"), (0, "large")]
+
+
+def test_protocol_streams_variants_and_rejects_whole_requests(blocking_jobs):
+    release, _ = blocking_jobs
+    requests = [
+        {"id": "a", "variants": [{"delay": 0.1}, {"fail": True}]},
+        {"id": "b", "variants": [{}, {}]},  # does not fit behind 'a'
+        {"id": "c", "command": "stats"},
+        {"command": "shutdown"},
+    ]
+
+    async def main(service):
+        writer = _Writer()
+        asyncio.get_running_loop().call_later(0.1, release.set)
+        assert await serve_connection(service, _reader(*requests), writer) is True
+        return writer.responses
+
+    with RenderService(max_concurrency=2, max_queue=1) as service:
+        responses = asyncio.run(main(service))
+
+    by_id = {}
+    for response in responses:
+        by_id.setdefault(response.get("id"), []).append(response)
+    assert by_id["b"] == [
+        {"id": "b", "ok": False, "busy": True, "error": by_id["b"][0]["error"]}
+    ]
+    assert by_id["c"][0]["stats"]["pending"] == 2
+    assert [response.get("variant") for response in by_id["a"]] == [1, 0, None]
+    assert by_id["a"][-1] == {"id": "a", "ok": False, "done": True, "variants": 2, "failed": 1}
+    assert responses[-1] == {"ok": True}  # shutdown acknowledged after in-flight work
+
+
+def test_renders_real_variants_concurrently():
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 400), "white").save(buffer, format="PNG")
+    photo = base64.b64encode(buffer.getvalue()).decode("ascii")
+    variant = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": photo,
+        "params": {"headline_text": "خبر فوری", "composed": True},
+    }
+    request = {"id": 1, "variants": [variant, dict(variant, params=dict(variant["params"], scale=0.5))]}
+
+    async def main(service):
+        writer = _Writer()
+        await serve_connection(service, _reader({"command": "ping"}, request), writer)
+        return writer.responses
+
+    with RenderService(max_concurrency=2) as service:
+        responses = asyncio.run(main(service))
+
+    assert responses[0] == {"id": None, "ok": True, "pong": True}
+    images = {r["variant"]: r for r in responses if "variant" in r}
+    assert all(r["ok"] for r in images.values()), images
+    assert (images[0]["encode"]["width"], images[1]["encode"]["width"]) == (400, 200)
+    assert responses[-1]["done"] is True and responses[-1]["ok"] is True
+
+
+def test_thread_renders_leave_stdout_alone():
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 200), "white").save(buffer, format="PNG")
+    job = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {"headline_text": "خبر فوری", "composed": True},
+    }
+    stdout = sys.stdout
+
+    async def main(service):
+        return [result async for _, result in service.render_variants([job] * 8)]
+
+    with RenderService(max_concurrency=4, max_queue=4) as service:
+        for _ in range(3):
+            results = asyncio.run(main(service))
+            assert all(result["ok"] for result in results)
+            assert sys.stdout is stdout
+
+
+def test_thread_service_sets_cache_size_limit(tmp_path):
+    try:
+        with RenderService(max_concurrency=1, cache_dir=str(tmp_path), cache_max_bytes=4096):
+            assert render_jobs._render_cache.max_bytes == 4096
+    finally:
+        render_jobs.set_render_cache(None)
+
+
+def test_process_service_recovers_from_a_killed_worker():
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 200), "white").save(buffer, format="PNG")
+    job = {
+        "template": "breaking_news",
+        "return": "bytes",
+        "user_image_base64": base64.b64encode(buffer.getvalue()).decode("ascii"),
+        "params": {"headline_text": "Breaking", "composed": True, "scale": 0.25},
+    }
+
+    async def main(service):
+        assert (await service.render(job))["ok"]
+        for pid in list(service._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        crashed = await service.render(job)
+        await asyncio.sleep(0.05)  # let the done callback release the slot
+        assert service.info()["pending"] == 0
+        return crashed, await service.render(job)
+
+    with RenderService(max_concurrency=1, max_queue=0, executor="process") as service:
+        crashed, recovered = asyncio.run(main(service))
+
+    assert not crashed["ok"] and "BrokenProcessPool" in crashed["error"]
+    assert recovered["ok"], recovered
+    assert service.info()["pending"] == 0
@@ -0,0 +1,129 @@
+# test_template_engine.py
+
+import io
+import json
+import os
+
+import pytest
+from PIL import Image, ImageDraw
+
+import template_engine
+from date_util import shamsi
+from img_util import paste_photo
+from render_context import RenderContext
+from template_engine import compile_plan, load_plan
+from text_utils import draw_text_in_box, draw_text_no_box
+
+CONTEXT = RenderContext.at("2025-03-21T12:00:00+03:30")
+FONT_PATH = "assets/Font/Sahel.ttf"  # bundled font; run pytest from the repository root
+
+
+def _photo_bytes(color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _spec(tmp_path, **overrides):
+    base = tmp_path / "base.png"
+    overlay = tmp_path / "overlay_{events}.png"
+    Image.new("RGBA", (400, 300), "white").save(base)
+    for events in range(3):
+        img = Image.new("RGBA", (400, 300), (0, 0, 0, 0))
+        img.paste((0, 0, 255, 128), (0, 250 - 20 * events, 400, 300))
+        img.save(str(overlay).format(events=events))
+    spec = {
+        "name": "card",
+        "base": str(base),
+        "overlays": [{"path": str(overlay)}],
+        "photo": {"position": [20, 20], "size": [160, 120]},
+        "params": {"title": "", "event1": "", "event2": ""},
+        "events": ["event1", "event2"],
+        "fonts": {"body": FONT_PATH},
+        "dates": {"day": {"calendar": "shamsi", "components": ["day", "month"]}},
+        "texts": [
+            {"name": "title", "param": "title", "font": "body", "box": [200, 20, 180, 120], "size": 30},
+            {"name": "date", "date": "day", "font": "body", "x": 20, "y": 160, "size": 24},
+            {
+                "name": "events", "each_event": True, "font": "body", "x": 380, "align": "right",
+                "y": {"by_events": [[], [200], [190, 230]]}, "size": 20,
+            },
+        ],
+    }
+    spec.update(overrides)
+    return spec
+
+
+def _write(tmp_path, spec):
+    path = tmp_path / "card.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return str(path)
+
+
+def test_bundled_specs_compile_once():
+    template_engine.clear_plan_cache()
+
+    assert template_engine.available_templates() == ["breaking_news", "newspaper"]
+    plan = load_plan("newspaper")
+
+    assert load_plan("newspaper") is plan
+    assert template_engine.plan_cache_info().hits == 1
+    assert plan.source in plan.assets and plan.fonts["headline"] in plan.assets
+
+
+@pytest.mark.skipif(not os.path.isfile(FONT_PATH), reason="Test font not found in local path.")
+def test_render_matches_hand_written_template(tmp_path):
+    spec = _spec(tmp_path)
+    plan = compile_plan(spec)
+
+    rendered = plan.render(
+        _photo_bytes(), context=CONTEXT, title="سلام دنیا", event1="یک", event2="دو"
+    )
+
+    expected = Image.open(spec["base"]).convert("RGBA")
+    paste_photo(expected, _photo_bytes(), (20, 20, 180, 140))
+    overlay = Image.open(spec["overlays"][0]["path"].format(events=2)).convert("RGBA")
+    expected.alpha_composite(overlay)
+    draw = ImageDraw.Draw(expected)
+    draw_text_in_box(draw, "سلام دنیا", FONT_PATH, (200, 20, 180, 120), font_size=30, is_rtl=True)
+    label = shamsi(year=False, month=True, day=True, date=CONTEXT.timestamp)
+    draw_text_no_box(draw, label, FONT_PATH, 20, 160, font_size=24, is_rtl=True)
+    for text, y in (("یک", 190), ("دو", 230)):
+        draw_text_no_box(draw, text, FONT_PATH, 380, y, alignment="right", font_size=20, is_rtl=True)
+
+    assert rendered.tobytes() == expected.tobytes()
+
+
+def test_spec_errors_name_the_template(tmp_path):
+    spec = _spec(tmp_path)
+    spec["texts"][0]["font"] = "missing"
+    with pytest.raises(ValueError, match="'card'.*undefined font 'missing'"):
+        compile_plan(spec)
+
+    spec = _spec(tmp_path)
+    spec["texts"][1] = dict(spec["texts"][0], param="subtitle")
+    with pytest.raises(ValueError, match="undefined param 'subtitle'"):
+        compile_plan(spec)
+
+    spec = _spec(tmp_path)
+    spec["texts"][2]["y"] = {"by_events": [[], [200]]}
+    with pytest.raises(ValueError, match="one entry per event count"):
+        compile_plan(spec)
+
+
+def test_plan_recompiled_when_spec_changes(tmp_path):
+    path = _write(tmp_path, _spec(tmp_path))
+    plan = load_plan(path)
+    assert load_plan(path) is plan
+
+    _write(tmp_path, _spec(tmp_path, params={"title": "default", "event1": "", "event2": ""}))
+    os.utime(path, ns=(1, 1))
+
+    assert load_plan(path).params["title"] == "default"
+
+
+def test_unknown_arguments_rejected_without_text_options(tmp_path):
+    plan = compile_plan(_spec(tmp_path))
+
+    with pytest.raises(TypeError, match="subtitle"):
+        plan.render(_photo_bytes(), context=CONTEXT, subtitle="x")
@@ -12,7 +12,7 @@ import text_utils
 # ------------------------------------------------------------
 
 # Adjust FONT_PATH to a valid .ttf on your system
-FONT_PATH = "src/Craft/Sahel.ttf"  # or "arial.ttf", "DejaVuSans.ttf", etc.
+FONT_PATH = "assets/Font/Sahel.ttf"  # bundled font; run pytest from the repository root
 
 
 # A helper function to check if test font is actually available
@@ -173,3 +173,163 @@ def test_draw_text_no_box(alignment):
     # If we got here, there's no error in rendering for that alignment
     # Optionally inspect final image visually:
     # img.save(f"test_output_no_box_{alignment}.png")
+
+
+# ------------------------------------------------------------
+# Font size search
+# ------------------------------------------------------------
+
+BUNDLED_FONTS = [
+    "assets/Font/Sahel.ttf",
+    "assets/Font/Ray-ExtraBlack.ttf",
+    "assets/Font/Anjoman-Black.ttf",
+]
+
+HEADLINE_CORPUS = [
+    "خبر فوری",
+    "كشف محموله عظيم سوخت قاچاق درخليج فارس؛ ضربه سنگين به قاچاقچيان",
+    "Breaking News Headline",
+    "A much longer Latin headline that has to wrap over several lines to fit",
+]
+
+
+@pytest.mark.skipif(
+    not all(font_exists(path) for path in BUNDLED_FONTS),
+    reason="Bundled fonts not found; run from the repository root.",
+)
+@pytest.mark.parametrize("font_path", BUNDLED_FONTS)
+@pytest.mark.parametrize(
+    "box",
+    # The breaking-news headline box with its real size bounds, then smaller boxes.
+    [(2820, 444, 1.5, 250), (2820, 444, 1.5, 120), (1200, 300, 1.0, 120), (300, 120, 1.0, 120)],
+)
+def test_binary_font_size_search_matches_linear_scan(font_path, box):
+    box_width, box_height, line_spacing, max_font_size = box
+    for text in HEADLINE_CORPUS:
+        # Same input draw_text_in_box passes for RTL text.
+        prepared_text = text_utils.prepare_farsi_text(text)
+        sizes = {
+            search: text_utils.calculate_font_size_to_fit(
+                prepared_text,
+                font_path,
+                box_width,
+                box_height,
+                max_font_size=max_font_size,
+                min_font_size=10,
+                line_spacing=line_spacing,
+                search=search,
+            )
+            for search in ("linear", "binary")
+        }
+        assert sizes["binary"] == sizes["linear"], text
+
+
+@pytest.mark.skipif(
+    not font_exists(BUNDLED_FONTS[2]), reason="Bundled fonts not found; run from the repository root."
+)
+@pytest.mark.parametrize("search", ["linear", "binary"])
+def test_font_size_search_finds_size_above_a_gap(search):
+    # Fits at 10-71 and at 115, but not at 72-114, whose lines overflow the
+    # box width; at 115 the words wrap onto two lines that fit.
+    size = text_utils.calculate_font_size_to_fit(
+        HEADLINE_CORPUS[1], BUNDLED_FONTS[2], 2820, 444, 250, 10, line_spacing=1.5, search=search
+    )
+    assert size == 115
+
+
+@pytest.mark.skipif(
+    not all(font_exists(path) for path in BUNDLED_FONTS),
+    reason="Bundled fonts not found; run from the repository root.",
+)
+@pytest.mark.parametrize("font_path", BUNDLED_FONTS)
+@pytest.mark.parametrize("font_size", [40, 90, 140])
+def test_incremental_wrap_matches_full_line_measurement(font_path, font_size):
+    draw = text_utils.create_temporary_draw(10, 10)
+    font = text_utils.get_font(font_path, font_size)
+    for text in HEADLINE_CORPUS:
+        for prepared in (text, text_utils.prepare_farsi_text(text)):
+            for box_width in (300, 800, 1500, 2820):
+                expected = text_utils.wrap_text_to_fit(
+                    prepared, font, box_width, draw, incremental=False
+                )
+                assert text_utils.wrap_text_to_fit(prepared, font, box_width, draw) == expected
+
+
+def test_prepare_farsi_text_is_memoized():
+    text_utils.clear_shaping_cache()
+    first = text_utils.prepare_farsi_text("سلام دنیا")
+    second = text_utils.prepare_farsi_text("سلام دنیا")
+
+    assert first == second
+    info = text_utils.shaping_cache_info()
+    assert info.misses == 1 and info.hits == 1
+
+
+def test_prepare_farsi_text_passes_ascii_through_unshaped():
+    text_utils.clear_shaping_cache()
+
+    for text in ("Friday, March 21 2025", "12:30 (AM) - #1!", "a  b"):
+        assert text_utils.prepare_farsi_text(text) == text_utils._shape(text) == text
+    assert text_utils.shaping_cache_info().misses == 0
+
+
+def test_prewarm_shaping_cache_covers_date_names():
+    import date_util
+
+    text_utils.clear_shaping_cache()
+    text_utils.prewarm_shaping_cache()
+    misses = text_utils.shaping_cache_info().misses
+
+    text_utils.prepare_farsi_text(date_util.farsi_shamsi_months[7])
+    text_utils.prepare_farsi_text(date_util.english_to_farsi_weekdays["Friday"])
+    assert text_utils.shaping_cache_info().misses == misses
+
+
+@pytest.mark.skipif(
+    not all(font_exists(path) for path in BUNDLED_FONTS),
+    reason="Bundled fonts not found; run from the repository root.",
+)
+@pytest.mark.parametrize("is_rtl", [True, False])
+def test_layout_text_in_box_can_be_drawn_later(is_rtl):
+    box = (20, 20, 600, 200)
+    text = HEADLINE_CORPUS[1]
+
+    layout = text_utils.layout_text_in_box(
+        text, BUNDLED_FONTS[0], box[2], box[3], auto_size=True, is_rtl=is_rtl
+    )
+    assert layout.fits(box[2], box[3])
+    assert len(layout.lines) == len(layout.line_bboxes) >= 1
+
+    direct = Image.new("RGB", (640, 240), "white")
+    text_utils.draw_text_in_box(
+        ImageDraw.Draw(direct), text, BUNDLED_FONTS[0], box, auto_size=True, is_rtl=is_rtl
+    )
+    reused = Image.new("RGB", (640, 240), "white")
+    text_utils.draw_text_layout(ImageDraw.Draw(reused), layout, box)
+
+    assert direct.tobytes() == reused.tobytes()
+
+
+@pytest.mark.skipif(
+    not font_exists(FONT_PATH), reason="Test font not found in local path."
+)
+@pytest.mark.parametrize("alignment", ["left", "center", "right"])
+def test_draw_text_no_box_sprite_matches_draw_text(alignment):
+    text_utils.clear_sprite_cache()
+    label = "جمعه ۱ فروردین ۱۴۰۴"
+    prepared = text_utils.prepare_farsi_text(label)
+    font = ImageFont.truetype(FONT_PATH, 31)
+    left, _, right, _ = ImageDraw.Draw(Image.new("RGB", (1, 1))).textbbox((0, 0), prepared, font=font)
+    x = {"left": 150, "center": 150 - (right - left) / 2, "right": 150 - (right - left)}[alignment]
+
+    expected = Image.new("RGBA", (300, 60), "white")
+    ImageDraw.Draw(expected).text((x, 10), prepared, font=font, fill=(200, 0, 0))
+    for color in ("black", (200, 0, 0)):  # one sprite serves every colour
+        actual = Image.new("RGBA", (300, 60), "white")
+        text_utils.draw_text_no_box(
+            ImageDraw.Draw(actual), label, FONT_PATH, 150, 10, alignment, color, font_size=31
+        )
+
+    assert actual.tobytes() == expected.tobytes()
+    info = text_utils.sprite_cache_info()
+    assert info.misses == 1 and info.hits == 1
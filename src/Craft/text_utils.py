@@ -7,9 +7,14 @@
 
 
 from PIL import Image, ImageDraw, ImageFont
-import arabic_reshaper
-from bidi.algorithm import get_display
-from typing import List, Tuple, Optional, Union
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Union
+import math
+import weakref
+
+from cache_util import CacheInfo, LRUCache
+from font_cache import get_font
+from render_profile import count, timed
 
 # Default configuration constants
 DEFAULT_COLOR: Union[str, Tuple[int, int, int]] = "black"
@@ -18,6 +23,23 @@ DEFAULT_LINE_SPACING: float = 1.0
 DEFAULT_MAX_FONT_SIZE: int = 250
 DEFAULT_MIN_FONT_SIZE: int = 10
 DEFAULT_IS_RTL: bool = True
+DEFAULT_FONT_SIZE_SEARCH: str = "linear"
+DEFAULT_SHAPING_CACHE_SIZE: int = 4096
+DEFAULT_SPRITE_CACHE_SIZE: int = 256
+
+_shaping_cache = LRUCache(DEFAULT_SHAPING_CACHE_SIZE)
+
+# Rasterized single-line labels drawn by draw_text_no_box, keyed by
+# (shaped text, font path, font size).
+_sprite_cache = LRUCache(DEFAULT_SPRITE_CACHE_SIZE)
+
+# Word widths measured by wrap_text_to_fit, per font object. Entries vanish with
+# their font, and a table is reset once it holds WORD_ADVANCE_CACHE_SIZE words.
+WORD_ADVANCE_CACHE_SIZE: int = 4096
+WRAP_ESTIMATE_TOLERANCE: float = 0.5  # fraction of the font size
+_word_advance_cache: "weakref.WeakKeyDictionary[ImageFont.FreeTypeFont, Dict[str, float]]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 def create_temporary_draw(width: int, height: int) -> ImageDraw.ImageDraw:
@@ -28,32 +50,154 @@ def create_temporary_draw(width: int, height: int) -> ImageDraw.ImageDraw:
     return ImageDraw.Draw(temp_img)
 
 
+def _shape(text: str) -> str:
+    # Imported on first use: LTR-only renders never load the shaping libraries.
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    count("shaped_strings")
+    reshaped_text = arabic_reshaper.reshape(text)
+    bidi_text = get_display(reshaped_text)
+    return bidi_text
+
+
 def prepare_farsi_text(text: str) -> str:
     """
     Prepares Farsi (RTL) text for correct rendering.
 
+    Results are memoized in a bounded LRU cache, so repeated strings (date
+    labels, candidate lines during wrapping) are shaped only once. Printable
+    ASCII is returned as is: shaping never changes it.
+
     Args:
         text (str): Original Farsi text.
 
     Returns:
         str: Properly shaped and bidi-handled text ready for rendering.
     """
-    reshaped_text = arabic_reshaper.reshape(text)
-    bidi_text = get_display(reshaped_text)
-    return bidi_text
+    count("shaping_calls")
+    if text.isascii() and text.isprintable():
+        return text
+    return _shaping_cache.get_or_create(text, lambda: _shape(text))
+
+
+def shaping_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the prepare_farsi_text cache."""
+    return _shaping_cache.info()
+
+
+def set_shaping_cache_size(max_entries: int) -> None:
+    """Changes how many shaped strings prepare_farsi_text keeps."""
+    _shaping_cache.resize(max_entries)
+
+
+def clear_shaping_cache() -> None:
+    """Drops all shaped strings and resets the statistics."""
+    _shaping_cache.clear()
+
+
+def prewarm_shaping_cache() -> None:
+    """
+    Shapes the month and weekday names from date_util ahead of the first render.
+    """
+    import date_util
+
+    names = list(date_util.farsi_gregorian_months.values())
+    names += date_util.farsi_shamsi_months.values()
+    names += date_util.farsi_islamic_months
+    names += date_util.english_to_farsi_weekdays.values()
+    names += date_util.english_to_farsi_weekdays_abbrev.values()
+    for name in names:
+        prepare_farsi_text(name)
+
+
+class TextSprite:
+    """
+    A shaped single-line label rasterized once as an "L" coverage mask.
+
+    The mask does not depend on the fill colour, which Pillow applies when the
+    mask is pasted, so one sprite serves every colour. It does depend on the
+    sub-pixel part of the drawing position, so one mask is kept per fractional
+    offset (in practice only 0 and 0.5, from centre alignment).
+
+    Attributes:
+        text (str): The shaped text.
+        font (ImageFont.FreeTypeFont): Font it is rasterized with.
+        width (int): Advance width used for alignment (textbbox right - left).
+    """
+
+    def __init__(self, text: str, font: ImageFont.FreeTypeFont, width: int):
+        self.text = text
+        self.font = font
+        self.width = width
+        self._masks: Dict[Tuple[float, float], Tuple[Image.Image, Tuple[int, int]]] = {}
+
+    def mask_at(self, start_x: float, start_y: float) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        Returns the mask and its (x, y) offset from the integer drawing position,
+        exactly as ImageDraw.text would rasterize it at that sub-pixel start.
+        """
+        key = (start_x, start_y)
+        entry = self._masks.get(key)
+        if entry is None:
+            count("sprites_rasterized")
+            core_mask, offset = self.font.getmask2(self.text, "L", start=key)
+            entry = self._masks[key] = (Image.Image()._new(core_mask), offset)
+        return entry
+
+
+def sprite_cache_info() -> CacheInfo:
+    """Returns hit/miss statistics of the draw_text_no_box sprite cache."""
+    return _sprite_cache.info()
+
+
+def set_sprite_cache_size(max_entries: int) -> None:
+    """Changes how many rasterized labels draw_text_no_box keeps."""
+    _sprite_cache.resize(max_entries)
+
+
+def clear_sprite_cache() -> None:
+    """Drops all rasterized labels and resets the statistics."""
+    _sprite_cache.clear()
+
+
+def _measure_width(text: str, font: ImageFont.FreeTypeFont, draw: ImageDraw.ImageDraw) -> int:
+    count("textbbox_calls")
+    left, _, right, _ = draw.textbbox((0, 0), prepare_farsi_text(text), font=font)
+    return right - left
+
+
+def _word_advances(font: ImageFont.FreeTypeFont) -> Dict[str, float]:
+    """Returns the per-font table of measured word widths, creating it if needed."""
+    advances = _word_advance_cache.get(font)
+    if advances is None or len(advances) > WORD_ADVANCE_CACHE_SIZE:
+        advances = {" ": font.getlength(" ")}
+        _word_advance_cache[font] = advances
+    return advances
 
 
 def wrap_text_to_fit(
-    text: str, font: ImageFont.FreeTypeFont, box_width: int, draw: ImageDraw.ImageDraw
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    box_width: int,
+    draw: ImageDraw.ImageDraw,
+    incremental: bool = True,
 ) -> List[str]:
     """
     Splits text into multiple lines to fit within a given pixel width.
 
+    The incremental engine shapes and measures each word (and the space advance)
+    once per font, then grows lines from those cached widths. The full line is
+    only measured when the estimate says the next word might not fit, to confirm
+    the break, so the result matches measuring every candidate line.
+
     Args:
         text (str): Prepared RTL or normal text to wrap.
         font (ImageFont.FreeTypeFont): Font object to measure text.
         box_width (int): Pixel width of the bounding box.
         draw (ImageDraw.ImageDraw): Draw object for measuring text size.
+        incremental (bool): Use cached word widths (default). If False, measure
+                            the whole candidate line after every word.
 
     Returns:
         list[str]: List of lines wrapped to fit the given width.
@@ -62,20 +206,59 @@ def wrap_text_to_fit(
     lines = []
     current_line = ""
 
+    if not incremental:
+        for word in words:
+            # Tentatively append word to the current line
+            test_line = f"{current_line} {word}".strip() if current_line else word
+            line_width = _measure_width(test_line, font, draw)
+
+            if line_width <= box_width:
+                current_line = test_line
+            else:
+                if current_line:  # If the line has content, push to lines
+                    lines.append(current_line)
+                current_line = word  # start new line with current word
+
+        if current_line:  # Add the last line if not empty
+            lines.append(current_line)
+
+        return lines
+
+    advances = _word_advances(font)
+    space_width = advances[" "]
+    # Joining words can shift the ink box by bearings and kerning; estimates
+    # within this margin of the box edge are confirmed with a full measurement.
+    tolerance = font.size * WRAP_ESTIMATE_TOLERANCE
+    current_width = 0.0
+
     for word in words:
-        # Tentatively append word to the current line
-        test_line = f"{current_line} {word}".strip() if current_line else word
-        left, _, right, _ = draw.textbbox(
-            (0, 0), prepare_farsi_text(test_line), font=font
-        )
-        line_width = right - left
+        word_width = advances.get(word)
+        if word_width is None:
+            word_width = _measure_width(word, font, draw)
+            advances[word] = word_width
+
+        if not current_line:
+            # A line always takes its first word, whether it fits or not.
+            current_line = word
+            current_width = word_width
+            continue
+
+        test_line = f"{current_line} {word}"
+        estimated_width = current_width + space_width + word_width
+        if estimated_width <= box_width - tolerance:
+            current_line = test_line
+            current_width = estimated_width
+            continue
 
+        # Close to or past the edge: confirm the break with the real line width.
+        line_width = _measure_width(test_line, font, draw)
         if line_width <= box_width:
             current_line = test_line
+            current_width = line_width
         else:
-            if current_line:  # If the line has content, push to lines
-                lines.append(current_line)
-            current_line = word  # start new line with current word
+            lines.append(current_line)
+            current_line = word
+            current_width = word_width
 
     if current_line:  # Add the last line if not empty
         lines.append(current_line)
@@ -83,6 +266,200 @@ def wrap_text_to_fit(
     return lines
 
 
+@dataclass(frozen=True)
+class TextLayout:
+    """
+    Wrapped and measured text, ready to be drawn into a box of the same size.
+
+    Attributes:
+        lines (tuple[str]): Lines to draw (shaped and bidi-handled when RTL).
+        line_bboxes (tuple): textbbox of each line drawn at (0, 0).
+        font_path (str): Path to the font file used for measuring.
+        font_size (int): Font size the text was laid out with.
+        line_spacing (float): Line spacing multiplier.
+        total_height (float): Height of the block, from the top of the first
+                              line to the bottom of the last one.
+        max_line_width (int): Width of the widest line.
+    """
+
+    lines: Tuple[str, ...]
+    line_bboxes: Tuple[Tuple[int, int, int, int], ...]
+    font_path: str
+    font_size: int
+    line_spacing: float
+    total_height: float
+    max_line_width: int
+
+    @property
+    def font(self) -> ImageFont.FreeTypeFont:
+        return get_font(self.font_path, self.font_size)
+
+    def fits(self, box_width: int, box_height: int) -> bool:
+        """Checks whether the block fits both dimensions of a box."""
+        return self.total_height <= box_height and self.max_line_width <= box_width
+
+
+def layout_text(
+    text: str,
+    font_path: str,
+    font_size: int,
+    box_width: int,
+    line_spacing: float = DEFAULT_LINE_SPACING,
+    is_rtl: bool = DEFAULT_IS_RTL,
+    draw: Optional[ImageDraw.ImageDraw] = None,
+) -> TextLayout:
+    """
+    Wraps text at a fixed font size and measures every line once.
+
+    Args:
+        text (str): Original text (Farsi or other languages).
+        font_path (str): Path to the TrueType/OpenType font file.
+        font_size (int): Font size to lay out with.
+        box_width (int): Pixel width to wrap to.
+        line_spacing (float): Line spacing multiplier.
+        is_rtl (bool): Whether lines must be shaped for right-to-left rendering.
+        draw (ImageDraw.ImageDraw): Optional draw object for measuring text size.
+
+    Returns:
+        TextLayout: The wrapped lines and their measurements.
+    """
+    if draw is None:
+        draw = create_temporary_draw(1, 1)
+    font = get_font(font_path, font_size)
+
+    raw_lines = wrap_text_to_fit(text, font, box_width, draw)
+    if is_rtl:
+        lines = tuple(prepare_farsi_text(line) for line in raw_lines)
+    else:
+        lines = tuple(raw_lines)
+    line_bboxes = tuple(draw.textbbox((0, 0), line, font=font) for line in lines)
+    count("textbbox_calls", len(lines))
+
+    # Every line but the last takes its height times the spacing.
+    line_heights = [bottom - top for _, top, _, bottom in line_bboxes]
+    total_height = sum(height * line_spacing for height in line_heights)
+    if line_heights:
+        total_height -= (line_spacing - 1.0) * line_heights[-1]
+    max_line_width = max((right - left for left, _, right, _ in line_bboxes), default=0)
+
+    return TextLayout(
+        lines=lines,
+        line_bboxes=line_bboxes,
+        font_path=font_path,
+        font_size=font_size,
+        line_spacing=line_spacing,
+        total_height=total_height,
+        max_line_width=max_line_width,
+    )
+
+
+def text_fits_box(
+    text: str,
+    font_path: str,
+    font_size: int,
+    box_width: int,
+    box_height: int,
+    line_spacing: float,
+    draw: ImageDraw.ImageDraw,
+    is_rtl: bool = False,
+) -> bool:
+    """
+    Checks whether text, wrapped at the given font size, fits inside the box.
+
+    The result is not monotonic in font_size: wrapping at a larger size can
+    give lines that fit where a smaller size does not, so a size that fits says
+    nothing about the sizes above it.
+
+    Args:
+        text (str): Text to wrap and measure.
+        font_path (str): Path to the TrueType/OpenType font file.
+        font_size (int): Font size to test.
+        box_width (int): Width of the bounding box in pixels.
+        box_height (int): Height of the bounding box in pixels.
+        line_spacing (float): Line spacing multiplier.
+        draw (ImageDraw.ImageDraw): Draw object for measuring text size.
+        is_rtl (bool): Whether lines are shaped before measuring (default False).
+
+    Returns:
+        bool: True if the wrapped text fits both dimensions of the box.
+    """
+    layout = layout_text(text, font_path, font_size, box_width, line_spacing, is_rtl, draw)
+    return layout.fits(box_width, box_height)
+
+
+def fit_text_layout(
+    text: str,
+    font_path: str,
+    box_width: int,
+    box_height: int,
+    max_font_size: int = DEFAULT_MAX_FONT_SIZE,
+    min_font_size: int = DEFAULT_MIN_FONT_SIZE,
+    line_spacing: float = DEFAULT_LINE_SPACING,
+    search: str = DEFAULT_FONT_SIZE_SEARCH,
+    is_rtl: bool = False,
+    draw: Optional[ImageDraw.ImageDraw] = None,
+) -> TextLayout:
+    """
+    Lays out text at the largest font size that fits within the box.
+
+    Takes the same arguments as calculate_font_size_to_fit, but returns the
+    layout of the chosen size instead of just the size, so it can be drawn
+    without wrapping and measuring again.
+
+    Returns:
+        TextLayout: Layout at the chosen size (min_font_size if none fit).
+    """
+    if search not in ("binary", "linear"):
+        raise ValueError("search must be 'binary' or 'linear'.")
+
+    # Temporary image and draw object for measurements
+    if draw is None:
+        draw = create_temporary_draw(1, 1)
+
+    layouts: Dict[int, TextLayout] = {}
+
+    def fits(font_size: int) -> bool:
+        layouts[font_size] = layout_text(
+            text, font_path, font_size, box_width, line_spacing, is_rtl, draw
+        )
+        return layouts[font_size].fits(box_width, box_height)
+
+    def layout_for(font_size: int) -> TextLayout:
+        if font_size not in layouts:
+            fits(font_size)
+        return layouts[font_size]
+
+    if search == "linear":
+        # Start from max font size and decrement to min font size
+        for font_size in range(max_font_size, min_font_size - 1, -1):
+            if fits(font_size):
+                return layouts[font_size]  # Found suitable font size
+        # If no suitable size found, use the minimum font size
+        return layout_for(min_font_size)
+
+    # Short texts usually fit at the largest size: settle that in one layout.
+    if fits(max_font_size):
+        return layouts[max_font_size]
+
+    # Bisect to a bracket where 'low' fits and 'high' does not.
+    low, high = min_font_size - 1, max_font_size
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+
+    # Fit is not monotonic in size, so a larger size may still fit above the
+    # bracket. Check them from the top, as the linear scan would, reusing the
+    # layouts bisection already measured.
+    for font_size in range(max_font_size - 1, low, -1):
+        if layout_for(font_size).fits(box_width, box_height):
+            return layouts[font_size]
+    # If nothing in range fits, 'low' is still below it.
+    return layout_for(max(low, min_font_size))
+
+
 def calculate_font_size_to_fit(
     text: str,
     font_path: str,
@@ -91,6 +468,8 @@ def calculate_font_size_to_fit(
     max_font_size: int = DEFAULT_MAX_FONT_SIZE,
     min_font_size: int = DEFAULT_MIN_FONT_SIZE,
     line_spacing: float = DEFAULT_LINE_SPACING,
+    search: str = DEFAULT_FONT_SIZE_SEARCH,
+    is_rtl: bool = False,
 ) -> int:
     """
     Determines the largest possible font size that fits the given text within specified box dimensions.
@@ -103,7 +482,11 @@ def calculate_font_size_to_fit(
         max_font_size (int): Largest font size to attempt.
         min_font_size (int): Smallest allowable font size.
         line_spacing (float): Line spacing multiplier. Default is 1.0 (normal spacing).
-        is_rtl (bool): Indicates if text is right-to-left (e.g., Farsi). Default is True.
+        search (str): 'linear' walks down from max_font_size one size at a time (default);
+                      'binary' bisects the size range, then checks the sizes above the
+                      result so it picks the same size as 'linear'.
+        is_rtl (bool): Whether lines are shaped before measuring. Default is False,
+                       for text that is already prepared or left to RAQM.
 
     Returns:
         int: Optimal font size that allows the text to fit within the box. Returns min_font_size if none fit.
@@ -111,133 +494,102 @@ def calculate_font_size_to_fit(
     Example:
         optimal_size = calculate_font_size_to_fit("text", "font.ttf", 400, 200, 48, 12)
     """
-    # Temporary image and draw object for measurements
-    draw = create_temporary_draw(box_width, box_height)
-
-    # Start from max font size and decrement to min font size
-    for font_size in range(max_font_size, min_font_size - 1, -1):
-        # Create font object with current font size
-        font = ImageFont.truetype(
-            font_path, font_size, layout_engine=ImageFont.Layout.RAQM
-        )
-
-        # Wrap text to fit box width
-        lines = wrap_text_to_fit(text, font, box_width, draw)
-
-        # Measure total text height (with line spacing)
-        total_height = 0
-        max_line_width = 0
-        for line in lines:
-            left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
-            line_width = right - left
-            line_height = bottom - top
-
-            max_line_width = max(max_line_width, line_width)
-            total_height += line_height * line_spacing
-
-        # Adjust total height by removing extra spacing after last line
-        total_height -= (line_spacing - 1.0) * line_height
-
-        # Check if dimensions fit inside box constraints
-        if total_height <= box_height and max_line_width <= box_width:
-            return font_size  # Found suitable font size
-
-    # If no suitable size found, return the minimum font size
-    return min_font_size
+    layout = fit_text_layout(
+        text,
+        font_path,
+        box_width,
+        box_height,
+        max_font_size,
+        min_font_size,
+        line_spacing,
+        search,
+        is_rtl,
+    )
+    return layout.font_size
 
 
-def draw_text_in_box(
-    draw: ImageDraw.ImageDraw,
+@timed("text.layout")
+def layout_text_in_box(
     text: str,
     font_path: str,
-    box: Tuple[int, int, int, int],
-    alignment: str = "center",
-    vertical_mode: str = "center_expanded",
+    box_width: int,
+    box_height: int,
     auto_size: bool = False,
-    color: Union[str, Tuple[int, int, int]] = DEFAULT_COLOR,
     line_spacing: float = DEFAULT_LINE_SPACING,
     max_font_size: int = DEFAULT_MAX_FONT_SIZE,
     min_font_size: int = DEFAULT_MIN_FONT_SIZE,
     is_rtl: bool = DEFAULT_IS_RTL,
     font_size: Optional[int] = None,
-) -> None:
+    draw: Optional[ImageDraw.ImageDraw] = None,
+) -> TextLayout:
     """
-    Draws text into a specified bounding box with alignment and vertical positioning options.
+    Computes the layout draw_text_in_box would draw, without drawing it.
+
+    The result depends only on the arguments, so callers may cache it and pass
+    it to draw_text_layout for every image that uses the same text and box.
 
     Args:
-        draw (ImageDraw.ImageDraw): Pillow drawing context.
         text (str): Text to render (Farsi or other languages).
         font_path (str): Path to TTF or OTF font file.
-        box (tuple): Bounding box coordinates and dimensions (left, top, width, height).
-                     Alternatively (x1, y1, x2, y2).
-        alignment (str): Horizontal alignment ('left', 'center', 'right').
-        vertical_mode (str): Vertical alignment mode ('top_to_bottom', 'center_expanded', 'bottom_to_top').
+        box_width (int): Width of the target box in pixels.
+        box_height (int): Height of the target box in pixels.
         auto_size (bool): Whether to automatically adjust font size to fit the box.
-        kwargs: Optional parameters like:
-            - color (str or tuple): Text color (default 'black').
-            - line_spacing (float): Line spacing multiplier (default 1.0).
-            - max_font_size (int): Max font size for auto-sizing (default 48).
-            - min_font_size (int): Min font size for auto-sizing (default 12).
-            - is_rtl (bool): Whether the text is right-to-left (default True).
-    """
-
-    if not text.strip():
-        return  # Empty or whitespace-only text, skip drawing
-
-    # Extract box dimensions
-    if len(box) == 4:
-        box_left, box_top, box_width, box_height = box
-        box_right = box_left + box_width
-        box_bottom = box_top + box_height
-    else:
-        raise ValueError("Box must be in format (left, top, width, height).")
-
-    if is_rtl:
-        prepared_text = prepare_farsi_text(text)
-    else:
-        prepared_text = text
+        line_spacing (float): Line spacing multiplier.
+        max_font_size (int): Max font size for auto-sizing.
+        min_font_size (int): Min font size for auto-sizing.
+        is_rtl (bool): Whether the text is right-to-left.
+        font_size (int): Fixed font size when auto_size is False (default 24).
+        draw (ImageDraw.ImageDraw): Optional draw object for measuring text size.
 
-    # Auto-size font or use provided font size
+    Returns:
+        TextLayout: The wrapped, measured text.
+    """
     if auto_size:
-        font_size = calculate_font_size_to_fit(
-            prepared_text,
+        return fit_text_layout(
+            text,
             font_path,
             box_width,
             box_height,
             max_font_size,
             min_font_size,
             line_spacing,
+            is_rtl=is_rtl,
+            draw=draw,
         )
-    elif font_size is None:
+    if font_size is None:
         font_size = DEFAULT_FONT_SIZE
+    return layout_text(text, font_path, font_size, box_width, line_spacing, is_rtl, draw)
 
-    # Load the font with determined size
-    font = ImageFont.truetype(font_path, font_size, layout_engine=ImageFont.Layout.RAQM)
 
-    raw_lines = wrap_text_to_fit(
-        text=text,
-        font=font,
-        box_width=box_width,
-        draw=draw,
-    )
+@timed("text.draw")
+def draw_text_layout(
+    draw: ImageDraw.ImageDraw,
+    layout: TextLayout,
+    box: Tuple[int, int, int, int],
+    alignment: str = "center",
+    vertical_mode: str = "center_expanded",
+    color: Union[str, Tuple[int, int, int]] = DEFAULT_COLOR,
+) -> None:
+    """
+    Draws a precomputed TextLayout into a box.
 
-    # Wrap text into multiple lines within the box width
-    # If is_rtl=False, we just leave them alone
-    if is_rtl:
-        shaped_lines = [prepare_farsi_text(line) for line in raw_lines]
+    Args:
+        draw (ImageDraw.ImageDraw): Pillow drawing context.
+        layout (TextLayout): Layout from layout_text_in_box for this box size.
+        box (tuple): Bounding box (left, top, width, height).
+        alignment (str): Horizontal alignment ('left', 'center', 'right').
+        vertical_mode (str): Vertical alignment mode ('top_to_bottom', 'center_expanded', 'bottom_to_top').
+        color (str or tuple): Text color (default 'black').
+    """
+    # Extract box dimensions
+    if len(box) == 4:
+        box_left, box_top, box_width, box_height = box
+        box_right = box_left + box_width
+        box_bottom = box_top + box_height
     else:
-        shaped_lines = raw_lines
-    lines = wrap_text_to_fit(prepared_text, font, box_width, draw)
-
-    # Calculate total height of text block with spacing
-    line_heights = []
-    for line in shaped_lines:
-        left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
-        line_heights.append(bottom - top)
+        raise ValueError("Box must be in format (left, top, width, height).")
 
-    total_text_height = (
-        sum(line_heights) + (len(lines) - 1) * (line_spacing - 1) * line_heights[0]
-    )
+    total_text_height = layout.total_height
 
     # Determine starting y-coordinate based on vertical_mode
     if vertical_mode == "top_to_bottom":
@@ -251,9 +603,10 @@ def draw_text_in_box(
             "vertical_mode must be 'top_to_bottom', 'center_expanded', or 'bottom_to_top'."
         )
 
+    font = layout.font
+
     # Draw each line with specified horizontal alignment
-    for idx, line in enumerate(shaped_lines):
-        _left, _top, _right, _bottom = draw.textbbox((0, 0), line, font=font)
+    for line, (_left, _top, _right, _bottom) in zip(layout.lines, layout.line_bboxes):
         line_width = _right - _left
         line_height = _bottom - _top
 
@@ -271,11 +624,71 @@ def draw_text_in_box(
         draw.text((current_x, current_y), line, font=font, fill=color)
 
         # Update y-coordinate for next line
-        current_y += line_height * line_spacing
-        if current_y  > box_bottom:
+        current_y += line_height * layout.line_spacing
+        if current_y > box_bottom:
             break
 
 
+def draw_text_in_box(
+    draw: ImageDraw.ImageDraw,
+    text: str,
+    font_path: str,
+    box: Tuple[int, int, int, int],
+    alignment: str = "center",
+    vertical_mode: str = "center_expanded",
+    auto_size: bool = False,
+    color: Union[str, Tuple[int, int, int]] = DEFAULT_COLOR,
+    line_spacing: float = DEFAULT_LINE_SPACING,
+    max_font_size: int = DEFAULT_MAX_FONT_SIZE,
+    min_font_size: int = DEFAULT_MIN_FONT_SIZE,
+    is_rtl: bool = DEFAULT_IS_RTL,
+    font_size: Optional[int] = None,
+) -> None:
+    """
+    Draws text into a specified bounding box with alignment and vertical positioning options.
+
+    Args:
+        draw (ImageDraw.ImageDraw): Pillow drawing context.
+        text (str): Text to render (Farsi or other languages).
+        font_path (str): Path to TTF or OTF font file.
+        box (tuple): Bounding box coordinates and dimensions (left, top, width, height).
+                     Alternatively (x1, y1, x2, y2).
+        alignment (str): Horizontal alignment ('left', 'center', 'right').
+        vertical_mode (str): Vertical alignment mode ('top_to_bottom', 'center_expanded', 'bottom_to_top').
+        auto_size (bool): Whether to automatically adjust font size to fit the box.
+        kwargs: Optional parameters like:
+            - color (str or tuple): Text color (default 'black').
+            - line_spacing (float): Line spacing multiplier (default 1.0).
+            - max_font_size (int): Max font size for auto-sizing (default 48).
+            - min_font_size (int): Min font size for auto-sizing (default 12).
+            - is_rtl (bool): Whether the text is right-to-left (default True).
+    """
+
+    if not text.strip():
+        return  # Empty or whitespace-only text, skip drawing
+
+    if len(box) != 4:
+        raise ValueError("Box must be in format (left, top, width, height).")
+    _box_left, _box_top, box_width, box_height = box
+
+    # Wrap and measure once; the same layout is used to pick the size and to draw.
+    layout = layout_text_in_box(
+        text,
+        font_path,
+        box_width,
+        box_height,
+        auto_size=auto_size,
+        line_spacing=line_spacing,
+        max_font_size=max_font_size,
+        min_font_size=min_font_size,
+        is_rtl=is_rtl,
+        font_size=font_size,
+        draw=draw,
+    )
+    draw_text_layout(draw, layout, box, alignment, vertical_mode, color)
+
+
+@timed("text.label")
 def draw_text_no_box(
     draw: ImageDraw.ImageDraw,
     text: str,
@@ -290,6 +703,10 @@ def draw_text_no_box(
     """
     Draws text at a given anchor point (x, y) without bounding box constraints.
 
+    Single-line text is rasterized once per (text, font, size) and kept in a
+    bounded LRU cache of TextSprites; later draws of the same label (dates,
+    weekdays, clock digits) only paste the cached mask.
+
     Args:
         draw (ImageDraw.ImageDraw): Pillow drawing context.
         text (str): Text to render.
@@ -309,22 +726,45 @@ def draw_text_no_box(
     else:
         prepared_text = text
 
-    # Load the font
-    font = ImageFont.truetype(font_path, font_size, layout_engine=ImageFont.Layout.RAQM)
+    if "\n" in prepared_text or draw.fontmode != "L":
+        _draw_text_uncached(draw, prepared_text, font_path, x, y, alignment, color, font_size)
+        return
 
-    # Measure text dimensions
-    left, _, right, _ = draw.textbbox((0, 0), prepared_text, font=font)
-    text_width = right - left
+    sprite = _sprite_cache.get((prepared_text, font_path, font_size))
+    if sprite is None:
+        font = get_font(font_path, font_size)
+        count("textbbox_calls")
+        left, _, right, _ = draw.textbbox((0, 0), prepared_text, font=font)
+        sprite = TextSprite(prepared_text, font, right - left)
+        _sprite_cache.put((prepared_text, font_path, font_size), sprite)
+
+    adjusted_x = _align_x(x, sprite.width, alignment)
+    mask, (offset_x, offset_y) = sprite.mask_at(math.modf(adjusted_x)[0], math.modf(y)[0])
+    draw.bitmap((int(adjusted_x) + offset_x, int(y) + offset_y), mask, fill=color)
 
+
+def _align_x(x: float, text_width: int, alignment: str) -> float:
     # Adjust x based on horizontal alignment
     if alignment == "right":
-        adjusted_x = x - text_width
+        return x - text_width
     elif alignment == "center":
-        adjusted_x = x - text_width / 2
+        return x - text_width / 2
     elif alignment == "left":
-        adjusted_x = x
-    else:
-        raise ValueError("alignment must be 'left', 'center', or 'right'.")
+        return x
+    raise ValueError("alignment must be 'left', 'center', or 'right'.")
 
-    # Draw text on the image
-    draw.text((adjusted_x, y), prepared_text, font=font, fill=color)
+
+def _draw_text_uncached(
+    draw: ImageDraw.ImageDraw,
+    prepared_text: str,
+    font_path: str,
+    x: int,
+    y: int,
+    alignment: str,
+    color: Union[str, Tuple[int, int, int]],
+    font_size: int,
+) -> None:
+    font = get_font(font_path, font_size)
+    count("textbbox_calls")
+    left, _, right, _ = draw.textbbox((0, 0), prepared_text, font=font)
+    draw.text((_align_x(x, right - left, alignment), y), prepared_text, font=font, fill=color)